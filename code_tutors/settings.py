@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from django.contrib.messages import constants as messages
 
@@ -65,6 +66,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'tutorials.context_processors.notifications',
             ],
         },
     },
@@ -84,6 +86,36 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Cached unread counts, dashboard statistics, tutor availability, filter options
+# and autocomplete results are invalidated by the worker process that writes
+# the data, so all workers must share one cache. Redis, used when REDIS_URL is
+# set (it needs the redis package), is recommended. Otherwise the cache is a
+# database table, created by migrate, which costs a query per cache read and
+# two per write.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'orca_cache',
+            'OPTIONS': {
+                # Room for the per-user, per-tutor and per-search keys of a large site
+                'MAX_ENTRIES': 100000,
+                'CULL_FREQUENCY': 10,
+            },
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -135,6 +167,9 @@ AUTH_USER_MODEL = 'tutorials.User'
 # Login URL for redirecting users from login protected views
 LOGIN_URL = '/log_in/'
 
+# Number of rows shown per page in the admin list views
+ADMIN_LIST_PAGE_SIZE = 25
+
 # Convert Django ERROR messages to Bootstrap DANGER messages
 MESSAGE_TAGS = {
     messages.ERROR: 'danger',
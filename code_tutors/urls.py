@@ -44,9 +44,13 @@ urlpatterns = [
     path('admin/invoices/', admin_views.list_invoices, name='list_invoices'),
     path('admin/invoices/create/', admin_views.create_update_invoice, name='create_invoice'),
     path('admin/invoices/update/<int:pk>/', admin_views.create_update_invoice, name='update_invoice'),
+    path('admin/invoices/generate/', admin_views.generate_invoices, name='generate_invoices'),
     path('admin/notifications/', admin_views.list_notifications, name='list_notifications'),
     path('admin/notifications/create/', admin_views.create_notification, name='create_notification'),
+    path('admin/notifications/broadcast/', admin_views.broadcast_notification, name='broadcast_notification'),
     path('admin/delete/<str:model_name>/<int:pk>/', admin_views.delete_object, name='delete_object'),
+    path('admin/export/<str:name>/', admin_views.export, name='export'),
+    path('admin/autocomplete/<str:name>/', admin_views.autocomplete, name='autocomplete'),
 
 ]
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
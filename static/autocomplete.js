@@ -0,0 +1,65 @@
+/* Autocomplete selects
+
+Selects rendered by AutocompleteSelect carry only their selected option. A
+search box is added above each of them, and the options matching what is
+typed are fetched from the select's data-autocomplete endpoint. The values of
+the form fields named in data-forward are sent along with the search. */
+
+(function () {
+  const DELAY = 250;
+
+  function setOptions(select, results) {
+    const selected = select.querySelector('option:checked');
+    const blank = select.querySelector('option[value=""]');
+    select.replaceChildren(...[blank, selected].filter((option, index, kept) => option && kept.indexOf(option) === index));
+    for (const result of results) {
+      if (!selected || String(result.id) !== selected.value) {
+        select.add(new Option(result.text, result.id));
+      }
+    }
+  }
+
+  function search(select, term) {
+    const params = new URLSearchParams({q: term});
+    for (const field of (select.dataset.forward || '').split(',').filter(Boolean)) {
+      const input = select.form && select.form.elements[field];
+      params.set(field, input ? input.value : '');
+    }
+    fetch(select.dataset.autocomplete + '?' + params, {credentials: 'same-origin'})
+      .then((response) => response.ok ? response.json() : {results: []})
+      .then((data) => setOptions(select, data.results));
+  }
+
+  function attach(select) {
+    const box = document.createElement('input');
+    box.type = 'search';
+    box.className = 'form-control mb-1';
+    box.placeholder = 'Type to search';
+    box.setAttribute('aria-label', 'Search ' + select.name);
+    select.before(box);
+    let timer;
+    box.addEventListener('input', () => {
+      clearTimeout(timer);
+      timer = setTimeout(() => search(select, box.value), DELAY);
+    });
+    // Fill the first options when the select is opened, again each time if they depend on other fields
+    select.addEventListener('focus', () => {
+      if (select.dataset.forward || !select.dataset.loaded) {
+        select.dataset.loaded = 'true';
+        search(select, box.value);
+      }
+    });
+  }
+
+  // Select an option that may not have been fetched yet, e.g. from a list of suggestions
+  window.autocompleteChoose = function (select, value, text) {
+    if (value && !Array.from(select.options).some((option) => option.value === value)) {
+      select.add(new Option(text, value));
+    }
+    select.value = value;
+  };
+
+  document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('select[data-autocomplete]').forEach(attach);
+  });
+})();
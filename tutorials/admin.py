@@ -1,5 +1,6 @@
 from django.contrib import admin
 from tutorials.models import User, Lesson, Invoice, Notification
+from tutorials.scheduling import match_pending_lessons
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -10,10 +11,20 @@ class UserAdmin(admin.ModelAdmin):
 
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
-    list_display = ('student', 'subject', 'date', 'duration', 'tutor', 'status', 'recurrence', 'recurrence_end_date')
+    list_display = ('student', 'subject', 'date', 'duration', 'tutor', 'status', 'recurrence', 'recurrence_end_date', 'has_invoice', 'paid')
     list_filter = ('status', 'subject', 'date', 'recurrence')
+    list_select_related = ('student', 'subject', 'tutor')
     search_fields = ('student__username', 'subject', 'tutor__username')
     ordering = ('-date',)
+    actions = ('match_tutors',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_billing_status()
+
+    @admin.action(description='Match selected pending lessons with available tutors')
+    def match_tutors(self, request, queryset):
+        matched, unmatched = match_pending_lessons(queryset)
+        self.message_user(request, f'{len(matched)} lessons matched, {len(unmatched)} left pending.')
 
 @admin.register(Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
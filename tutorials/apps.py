@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.core.management import call_command
+from django.db.models.signals import post_migrate
+
+
+def create_cache_table(using='default', **kwargs):
+    """Create the table of the database cache, if one is configured, so that migrate alone sets up the site."""
+    call_command('createcachetable', database=using, verbosity=0)
 
 
 class TutorialsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tutorials'
+
+    def ready(self):
+        from tutorials import signals  # noqa: F401
+        from tutorials.search import install_search_indexes
+        post_migrate.connect(install_search_indexes, sender=self)
+        post_migrate.connect(create_cache_table, sender=self)
@@ -0,0 +1,105 @@
+"""Autocomplete lookups behind the user and lesson dropdowns of the admin forms.
+
+The forms render only the selected option and fetch the others from these
+lookups as the admin types, so a form never loads a whole table. Users are
+matched case-insensitively on a username prefix with a range condition over
+the lowercased username, which every database answers from the
+Lower('username') indexes, unlike LIKE on SQLite.
+"""
+
+import time
+from urllib.parse import quote
+from django.core.cache import cache
+from django.db.models.functions import Lower
+from tutorials.models import User, Subject, Lesson
+
+# Most options returned for a search
+AUTOCOMPLETE_LIMIT = 20
+# How long the options of a search are kept in the cache, in seconds
+AUTOCOMPLETE_TIMEOUT = 300
+# Longest search term, longer terms are truncated
+MAX_TERM_LENGTH = 50
+# Sorts after every other character, closing the range of a prefix
+LAST_CHARACTER = '\U0010ffff'
+
+
+def username_prefix(queryset, term):
+    """Return the users whose username starts with the term, ignoring case, the leading '@' being optional."""
+    prefix = (term if term.startswith('@') else '@' + term).lower()
+    usernames = queryset.alias(lower_username=Lower('username'))
+    return usernames.filter(lower_username__gte=prefix, lower_username__lt=prefix + LAST_CHARACTER).order_by('lower_username')
+
+def student_lessons(queryset, term, student=''):
+    """Return the lessons of a student, latest first, whose subject starts with the term."""
+    if not student.isdigit():
+        return queryset.none()
+    lessons = queryset.filter(student_id=student).order_by('-date')
+    if term:
+        lessons = lessons.filter(subject__in=Subject.objects.filter(name__istartswith=term))
+    return lessons
+
+
+class Lookup:
+    """An autocomplete source: its base queryset, search, forwarded form fields and the models it depends on.
+
+    search receives the queryset, the term and the values of the forwarded
+    fields as keyword arguments, and returns the matching rows in order.
+    """
+
+    def __init__(self, queryset, search, sources, forward=()):
+        self.queryset = queryset
+        self.search = search
+        self.sources = sources
+        self.forward = list(forward)
+
+    def results(self, term, forwarded, limit=AUTOCOMPLETE_LIMIT):
+        """Return the first matching rows as {'id', 'text'} dicts."""
+        rows = self.search(self.queryset(), term, **forwarded)[:limit]
+        return [{'id': row.pk, 'text': str(row)} for row in rows]
+
+
+LOOKUPS = {
+    'students': Lookup(lambda: User.objects.filter(type='student'), username_prefix, {User: {'username', 'type'}}),
+    'tutors': Lookup(lambda: User.objects.filter(type='tutor'), username_prefix, {User: {'username', 'type'}}),
+    'users': Lookup(lambda: User.objects.all(), username_prefix, {User: {'username'}}),
+    'lessons': Lookup(
+        lambda: Lesson.objects.select_related('subject', 'student'),
+        student_lessons,
+        {Lesson: {'student', 'subject', 'date'}, Subject: {'name'}, User: {'username'}},
+        forward=['student'],
+    ),
+}
+
+def autocomplete_version_key(name):
+    return f'autocomplete_version:{name}'
+
+def autocomplete_cache_key(name, term, forwarded):
+    """Return the cache key of a search under the lookup's current version, started from the clock."""
+    version = cache.get_or_set(autocomplete_version_key(name), lambda: time.time_ns() // 1000, None)
+    values = ':'.join(quote(forwarded[field]) for field in sorted(forwarded))
+    return f'autocomplete:{name}:{version}:{values}:{quote(term)}'
+
+def autocomplete(name, term, params=None):
+    """Return the options of a lookup matching the term, computing them when the cache is cold.
+
+    params holds the request parameters the lookup's forwarded fields are read from.
+    """
+    lookup = LOOKUPS[name]
+    term = term.strip()[:MAX_TERM_LENGTH]
+    forwarded = {field: (params or {}).get(field, '') for field in lookup.forward}
+    key = autocomplete_cache_key(name, term, forwarded)
+    results = cache.get(key)
+    if results is None:
+        results = lookup.results(term, forwarded)
+        cache.set(key, results, AUTOCOMPLETE_TIMEOUT)
+    return results
+
+def invalidate_autocomplete(*models):
+    """Move the lookups whose options depend on any of the models to a new version."""
+    for name, lookup in LOOKUPS.items():
+        if lookup.sources.keys() & set(models):
+            try:
+                cache.incr(autocomplete_version_key(name))
+            except ValueError:
+                # No version yet, the next search starts a new one
+                pass
@@ -0,0 +1,45 @@
+"""Batch invoicing of approved lessons."""
+
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Sum
+from tutorials.models import Lesson, Invoice
+from tutorials.options import invalidate_filter_options
+from tutorials.stats import invalidate_dashboard_stats
+
+
+def uninvoiced_lessons():
+    """Return the approved lessons without an invoice, selected with one anti-join."""
+    return Lesson.objects.filter(status='Approved').filter(~Exists(Invoice.objects.filter(lesson=OuterRef('pk'))))
+
+def preview_invoices():
+    """Return the number and total of the invoices the next billing run would create, in one query."""
+    totals = uninvoiced_lessons().with_invoice_amount().aggregate(count=Count('pk'), total=Sum('invoice_amount'))
+    return totals['count'], (totals['total'] or Decimal('0')).quantize(Decimal('0.01'))
+
+def invoice_approved_lessons(batch_size=1000, commit=True):
+    """Invoice every approved lesson that has no invoice yet.
+
+    Amounts are computed by the database with Lesson.objects.with_invoice_amount(),
+    lessons are read in chunks and invoices written with bulk_create, all in
+    one transaction. Lessons invoiced by an earlier run are skipped, so the
+    job can be re-run safely. Returns the number of invoices and their total.
+    """
+    if not commit:
+        return preview_invoices()
+    count, total = 0, Decimal('0.00')
+    with transaction.atomic():
+        lessons = uninvoiced_lessons().with_invoice_amount().order_by('pk').values_list('pk', 'student_id', 'date', 'invoice_amount')
+        batch = []
+        for pk, student_id, date, amount in lessons.iterator(chunk_size=batch_size):
+            batch.append(Invoice(student_id=student_id, lesson_id=pk, amount=amount, due_date=date.date()))
+            count += 1
+            total += amount
+            if len(batch) == batch_size:
+                Invoice.objects.bulk_create(batch)
+                batch = []
+        Invoice.objects.bulk_create(batch)
+    if count:
+        invalidate_dashboard_stats()
+        invalidate_filter_options(Invoice)
+    return count, total.quantize(Decimal('0.01'))
@@ -0,0 +1,10 @@
+from django.utils.functional import SimpleLazyObject
+from tutorials.notifications import unread_count
+
+
+def notifications(request):
+    """Add the logged-in user's unread notification count, read from the cache only when a template uses it."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'unread_notification_count': SimpleLazyObject(lambda: unread_count(user.pk))}
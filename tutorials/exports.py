@@ -0,0 +1,77 @@
+"""Streaming CSV and JSON Lines exports of the admin lists."""
+
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from tutorials.filters import filter_users, filter_lessons, filter_invoices
+from tutorials.models import User, Lesson, Invoice
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/jsonl',
+}
+
+
+class Export:
+    """An exportable admin list: its base queryset, list filters and (header, field) columns."""
+
+    def __init__(self, queryset, filter, columns):
+        self.queryset = queryset
+        self.filter = filter
+        self.columns = columns
+
+    def rows(self, params, chunk_size=CHUNK_SIZE):
+        """Yield the filtered rows as tuples, reading chunk_size rows at a time."""
+        queryset = self.filter(self.queryset(), params).order_by('pk')
+        return queryset.values_list(*[field for _, field in self.columns]).iterator(chunk_size=chunk_size)
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+
+EXPORTS = {
+    'users': Export(
+        lambda: User.objects.all(),
+        filter_users,
+        [('id', 'pk'), ('username', 'username'), ('email', 'email'), ('first_name', 'first_name'), ('last_name', 'last_name'), ('type', 'type')],
+    ),
+    'lessons': Export(
+        lambda: Lesson.objects.filter(date__gte=timezone.now()).with_billing_status(),
+        filter_lessons,
+        [('id', 'pk'), ('student', 'student__username'), ('subject', 'subject__name'), ('tutor', 'tutor__username'),
+         ('date', 'date'), ('duration', 'duration'), ('status', 'status'), ('recurrence', 'recurrence'),
+         ('recurrence_end_date', 'recurrence_end_date'), ('invoiced', 'is_invoiced'), ('paid', 'is_paid'), ('invoiced_amount', 'invoiced_amount')],
+    ),
+    'invoices': Export(
+        lambda: Invoice.objects.all(),
+        filter_invoices,
+        [('id', 'pk'), ('student', 'student__username'), ('lesson', 'lesson_id'), ('amount', 'amount'), ('due_date', 'due_date'), ('paid', 'paid')],
+    ),
+}
+
+
+class Echo:
+    """File-like object whose write returns the value, so csv.writer can produce lines lazily."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(headers, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+def jsonl_lines(headers, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n'
+
+def export_lines(name, format, params):
+    """Return an iterator over the lines of the named export in the given format."""
+    export = EXPORTS[name]
+    lines = csv_lines if format == 'csv' else jsonl_lines
+    return lines(export.headers, export.rows(params))
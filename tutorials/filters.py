@@ -0,0 +1,79 @@
+"""Filter and search parameters shared by the admin list views and the exports."""
+
+from decimal import Decimal, InvalidOperation
+from django.db.models import Q
+from tutorials.models import User, Subject, Notification
+from tutorials.search import matching, prefix_rank
+
+
+def parse_amount(text):
+    """Return the text as a Decimal amount, or None if it is not a number."""
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        return None
+    return amount if amount.is_finite() else None
+
+
+def filter_users(users, params):
+    """Apply the user list filters and search in params to a user queryset."""
+    type_filter = params.get('type')
+    if type_filter: users = users.filter(type=type_filter)
+
+    search_query = params.get('search')
+    if search_query:
+        users = users.filter(pk__in=matching(User, search_query)).annotate(search_rank=prefix_rank(search_query))
+    return users
+
+def filter_lessons(lessons, params):
+    """Apply the lesson list filters and search in params to a lesson queryset."""
+    status_filter = params.get('status')
+    student_filter = params.get('student')
+    subject_filter = params.get('subject')
+    tutor_filter = params.get('tutor')
+    duration_filter = params.get('duration')
+    recurrece_filter = params.get('recurrence')
+
+    if status_filter: lessons = lessons.filter(status=status_filter)
+    if student_filter: lessons = lessons.filter(student__id=student_filter)
+    if subject_filter: lessons = lessons.filter(subject=subject_filter)
+    if tutor_filter: lessons = lessons.filter(tutor=tutor_filter)
+    if duration_filter: lessons = lessons.filter(duration=duration_filter)
+    if recurrece_filter: lessons = lessons.filter(recurrence=recurrece_filter)
+
+    search_query = params.get('search')
+    if search_query:
+        usernames = matching(User, search_query, ['username'])
+        subjects = Subject.objects.filter(name__icontains=search_query).values('pk')
+        lessons = lessons.filter(Q(student__in=usernames) | Q(tutor__in=usernames) | Q(subject__in=subjects))
+    return lessons
+
+def filter_invoices(invoices, params):
+    """Apply the invoice list filters and search in params to an invoice queryset."""
+    paid_filter = params.get('paid')
+    student_filter = params.get('student')
+
+    if paid_filter: invoices = invoices.filter(paid=(paid_filter == 'True'))
+    if student_filter: invoices = invoices.filter(student__id=student_filter)
+
+    search_query = params.get('search')
+    if search_query:
+        condition = Q(student__in=matching(User, search_query, ['username']))
+        amount = parse_amount(search_query)
+        if amount is not None:
+            condition |= Q(amount=amount)
+        invoices = invoices.filter(condition)
+    return invoices
+
+def filter_notifications(notifications, params):
+    """Apply the notification list filters and search in params to a notification queryset."""
+    status_filter = params.get('is_read')
+    user_filter = params.get('user')
+
+    if status_filter: notifications = notifications.filter(is_read=status_filter)
+    if user_filter: notifications = notifications.filter(user__id=user_filter)
+
+    search_query = params.get('search')
+    if search_query:
+        notifications = notifications.filter(Q(user__in=matching(User, search_query, ['username'])) | Q(pk__in=matching(Notification, search_query)))
+    return notifications
@@ -1,9 +1,13 @@
 from django import forms
 from django.contrib.auth import authenticate
 from django.core.validators import RegexValidator
-from tutorials.models import User, Subject, Lesson, Invoice, Notification
+from django.db.models import Exists, OuterRef, Q
+from django.urls import reverse
+from django.utils import timezone
+from tutorials.models import User, Subject, Lesson, LessonOccurrence, Invoice, Notification
 from datetime import datetime, time, timedelta
 from tutorials.helpers import calculate_lesson_dates
+from tutorials.scheduling import available_tutors, lesson_conflicts
 
 # Profile forms
 class LogInForm(forms.Form):
@@ -105,10 +109,54 @@ class SignUpForm(NewPasswordMixin, forms.ModelForm):
         return user
 
 
+# Autocomplete widget
+class AutocompleteSelect(forms.Select):
+    """Select of a ModelChoiceField that renders only the selected option.
+
+    The other options are fetched from an autocomplete lookup as the user
+    types, the values of the forward fields of the form being sent along.
+    The field still validates the submitted value with a lookup by primary key.
+    """
+
+    class Media:
+        js = ['autocomplete.js']
+
+    def __init__(self, lookup, forward=(), attrs=None):
+        super().__init__(attrs)
+        self.lookup = lookup
+        self.forward = list(forward)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete'] = reverse('autocomplete', args=[self.lookup])
+        if self.forward:
+            context['widget']['attrs']['data-forward'] = ','.join(self.forward)
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        """Return the blank option and the selected ones, reading only the selected rows."""
+        field = self.choices.field
+        choices = [('', field.empty_label)] if field.empty_label is not None else []
+        pks = [pk for pk in value if str(pk).isdigit()]
+        if pks:
+            choices += [self.choices.choice(obj) for obj in self.choices.queryset.filter(pk__in=pks)]
+        return [
+            (None, [self.create_option(name, option_value, label, str(option_value) in value, index, attrs=attrs)], index)
+            for index, (option_value, label) in enumerate(choices)
+        ]
+
+
 # Lessons forms
+def describe_conflicts(conflicts):
+    """Return a readable list of the existing lessons involved in conflicts."""
+    details = {}
+    for date, lesson, lesson_date in conflicts:
+        details.setdefault(lesson.pk, f"{lesson.subject} on {lesson_date.strftime('%d/%m/%Y %H:%M')}")
+    return ', '.join(details.values())
+
 class LessonForm(forms.ModelForm):
-    student = forms.ModelChoiceField(queryset=User.objects.filter(type='student').order_by('username'), required=True)
-    tutor = forms.ModelChoiceField(queryset=User.objects.filter(type='tutor').order_by('username'), required=False)
+    student = forms.ModelChoiceField(queryset=User.objects.filter(type='student'), widget=AutocompleteSelect('students'), required=True)
+    tutor = forms.ModelChoiceField(queryset=User.objects.filter(type='tutor'), widget=AutocompleteSelect('tutors'), required=False)
     subject = forms.ModelChoiceField(queryset=Subject.objects.all().order_by('name'), required=True)
     duration = forms.IntegerField(widget=forms.NumberInput(attrs={'type': 'number', 'step': 15, 'min': 30, 'max': 240}), required=True)
 
@@ -145,23 +193,35 @@ class LessonForm(forms.ModelForm):
             self.add_error('tutor', f'This tutor does not teach {subject}, it only teaches {tutor.get_subjects()}.')
             self.add_error('subject', f'The tutor {tutor} does not teach this subject.')
         """Ensure that the lesson date do not overlap."""
-        for lesson_date in lesson_dates:
-            lesson_end_time = lesson_date + timedelta(minutes=duration)
-            overlapping_student_lessons = Lesson.objects.filter(student=student, date__lt=lesson_end_time, date__gte=date).exclude(pk=self.instance.pk)
-            if overlapping_student_lessons.exists():
-                overlapping_details = ', '.join([f"{ol.subject} on {ol.date.strftime('%d/%m/%Y %H:%M')}" for ol in overlapping_student_lessons])
-                self.add_error('date', f'The lesson time overlaps for the student {student} with an existing lesson: {overlapping_details}')
-                break
-            if tutor is not None:
-                overlapping_tutor_lessons = Lesson.objects.filter(tutor=tutor, date__lt=lesson_end_time, date__gte=date).exclude(pk=self.instance.pk)
-                if overlapping_tutor_lessons.exists():
-                    overlapping_details = ', '.join([f"{ol.subject} on {ol.date.strftime('%d/%m/%Y %H:%M')}" for ol in overlapping_tutor_lessons])
-                    self.add_error('date', f'The lesson time overlaps for the tutor {tutor} with an existing lesson: {overlapping_details}')
-                    self.add_error('tutor', f'The tutor {tutor} has an overlapping lesson on {lesson_date.strftime("%d/%m/%Y %H:%M")}, choose other tutor or change date.')
-                    break
-        
+        bookings = Lesson.objects.exclude(status='Rejected').exclude(pk=self.instance.pk)
+        student_conflicts = lesson_conflicts(bookings.filter(student=student), lesson_dates, duration)
+        if student_conflicts:
+            self.add_error('date', f'The lesson time overlaps for the student {student} with an existing lesson: {describe_conflicts(student_conflicts)}')
+        if tutor is not None:
+            tutor_conflicts = lesson_conflicts(bookings.filter(tutor=tutor), lesson_dates, duration)
+            if tutor_conflicts:
+                self.add_error('date', f'The lesson time overlaps for the tutor {tutor} with an existing lesson: {describe_conflicts(tutor_conflicts)}')
+                self.add_error('tutor', f'The tutor {tutor} has an overlapping lesson on {tutor_conflicts[0][0].strftime("%d/%m/%Y %H:%M")}, choose other tutor or change date.')
+
         return cleaned_data
 
+    def suggested_tutors(self):
+        """Return the tutors teaching the lesson's subject who are free for all of its occurrences."""
+        if hasattr(self, 'cleaned_data'):
+            data = self.cleaned_data
+            subject = data.get('subject')
+            date, duration = data.get('date'), data.get('duration')
+            recurrence, recurrence_end_date = data.get('recurrence'), data.get('recurrence_end_date')
+        else:
+            lesson = self.instance
+            subject = lesson.subject_id
+            date, duration = lesson.date, lesson.duration
+            recurrence, recurrence_end_date = lesson.recurrence, lesson.recurrence_end_date
+        if not subject or not date or not duration:
+            return []
+        lesson_dates = calculate_lesson_dates(date, recurrence_end_date, recurrence)
+        return available_tutors(subject, lesson_dates, duration, exclude=self.instance)
+
 class RequestForm(forms.ModelForm):
     date = forms.DateTimeField(widget=forms.DateTimeInput(attrs={'type':'datetime-local'}))
     duration = forms.IntegerField(widget=forms.NumberInput(attrs={'type': 'number', 'step': 15, 'min': 30, 'max': 240}))
@@ -266,8 +326,8 @@ class ProfileForm(forms.ModelForm):
 # Invoice form
 class InvoiceForm(forms.ModelForm):
     """Form to update user profiles."""
-    student = forms.ModelChoiceField(queryset=User.objects.filter(type='student').order_by('username'))
-    lesson = forms.ModelChoiceField(queryset=Lesson.objects.all().order_by('student'), required=False)
+    student = forms.ModelChoiceField(queryset=User.objects.filter(type='student'), widget=AutocompleteSelect('students'))
+    lesson = forms.ModelChoiceField(queryset=Lesson.objects.select_related('subject', 'student'), widget=AutocompleteSelect('lessons', forward=['student']), required=False)
     amount = forms.DecimalField(widget=forms.NumberInput(attrs={'min': 0, 'step': 0.50, 'placeholder': '£'}), max_digits=10, decimal_places=2)
     due_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
     paid = forms.ChoiceField(choices=[(True, 'Paid'), (False, 'Not Paid')], widget=forms.Select(attrs={'class': 'form-control'}), initial=False)
@@ -282,7 +342,7 @@ class InvoiceForm(forms.ModelForm):
         lesson = cleaned_data.get('lesson')
 
         """Ensure that the student is a student."""
-        if student not in User.objects.filter(type='student'):
+        if student is not None and student.type != 'student':
             self.add_error('student', 'The student must be a user of type student.')
         """Ensure that the student matches the lesson student."""
         if lesson and student != lesson.student:
@@ -294,7 +354,7 @@ class InvoiceForm(forms.ModelForm):
 # Notification form
 class NotificationForm(forms.ModelForm):
     """Form to create notifications."""
-    user = forms.ModelChoiceField(queryset=User.objects.all().order_by('username'), required=True)
+    user = forms.ModelChoiceField(queryset=User.objects.all(), widget=AutocompleteSelect('users'), required=True)
     message = forms.CharField(widget=forms.Textarea(attrs={'rows': 3}), required=True)
 
     class Meta:
@@ -309,4 +369,42 @@ class NotificationForm(forms.ModelForm):
         if not message:
             self.add_error('message', 'The message cannot be empty.')
 
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+
+class BroadcastForm(forms.Form):
+    """Form to send one notification to every user matching a set of audience filters."""
+    message = forms.CharField(widget=forms.Textarea(attrs={'rows': 3}), max_length=100)
+    type = forms.ChoiceField(choices=[('', 'All users')] + list(User.USER_TYPE_CHOICES), required=False, label='User type')
+    subject = forms.ModelChoiceField(queryset=Subject.objects.order_by('name'), required=False, label='Teaches subject', empty_label='Any subject')
+    lessons_from = forms.DateField(required=False, label='Has lessons from', widget=forms.DateInput(attrs={'type': 'date'}))
+    lessons_to = forms.DateField(required=False, label='Has lessons until', widget=forms.DateInput(attrs={'type': 'date'}))
+    has_overdue_invoices = forms.BooleanField(required=False, label='Has overdue invoices')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        lessons_from = cleaned_data.get('lessons_from')
+        lessons_to = cleaned_data.get('lessons_to')
+        if lessons_from and lessons_to and lessons_to < lessons_from:
+            self.add_error('lessons_to', 'The end of the lesson range must not be before its start.')
+        return cleaned_data
+
+    def recipients(self):
+        """Return the users matched by the audience filters, one row per user."""
+        users = User.objects.all()
+        data = self.cleaned_data
+        if data.get('type'):
+            users = users.filter(type=data['type'])
+        if data.get('subject'):
+            users = users.filter(Exists(User.subjects.through.objects.filter(user=OuterRef('pk'), subject=data['subject'])))
+        if data.get('lessons_from') or data.get('lessons_to'):
+            occurrences = LessonOccurrence.objects.filter(Q(lesson__student=OuterRef('pk')) | Q(lesson__tutor=OuterRef('pk'))).exclude(lesson__status='Rejected')
+            # Compare start itself with day boundaries, so the (lesson, start) index can seek to them
+            if data.get('lessons_from'):
+                occurrences = occurrences.filter(start__gte=timezone.make_aware(datetime.combine(data['lessons_from'], time.min)))
+            if data.get('lessons_to'):
+                occurrences = occurrences.filter(start__lt=timezone.make_aware(datetime.combine(data['lessons_to'] + timedelta(days=1), time.min)))
+            users = users.filter(Exists(occurrences))
+        if data.get('has_overdue_invoices'):
+            users = users.filter(Exists(Invoice.objects.filter(student=OuterRef('pk'), paid=False, due_date__lt=timezone.now().date())))
+        return users
@@ -1,46 +1,107 @@
 from django.shortcuts import redirect
 from django.apps import apps
+from django.utils import timezone
+from calendar import monthrange
 from datetime import datetime, timedelta
 from random import randint
 import pytz
 
+# Gap between consecutive occurrences of a recurring lesson
+RECURRENCE_INTERVALS = {
+    'Daily': timedelta(days=1),
+    'Weekly': timedelta(weeks=1),
+    'Monthly': timedelta(days=30),
+}
+
+# Price of one minute of tutoring, in pounds
+PRICE_PER_MINUTE = 0.5
+
+def occurrence_count(start_date, end_date, recurrence):
+    """Return the number of occurrences in a lesson series without enumerating it."""
+    if recurrence == 'None':
+        return 1
+    interval = RECURRENCE_INTERVALS.get(recurrence)
+    if interval is None or start_date is None or end_date is None or start_date.date() > end_date:
+        return 0
+    return (end_date - start_date.date()).days // interval.days + 1
+
+def occurrence_index(start_date, instant, interval, strict=False):
+    """Return the index of the first occurrence at (or strictly after) the given instant."""
+    if instant < start_date:
+        return 0
+    index, remainder = divmod(instant - start_date, interval)
+    if remainder or strict:
+        index += 1
+    return index
+
+def next_occurrence(start_date, end_date, recurrence, instant, strict=False):
+    """Return the first occurrence at (or strictly after) the given instant, or None."""
+    count = occurrence_count(start_date, end_date, recurrence)
+    if count == 0:
+        return None
+    if recurrence == 'None':
+        return start_date if start_date > instant or (start_date == instant and not strict) else None
+    interval = RECURRENCE_INTERVALS[recurrence]
+    index = occurrence_index(start_date, instant, interval, strict)
+    return start_date + index * interval if index < count else None
+
+def occurrences_between(start_date, end_date, recurrence, window_start=None, window_end=None):
+    """Return the occurrences of a lesson series starting within [window_start, window_end)."""
+    count = occurrence_count(start_date, end_date, recurrence)
+    if count == 0:
+        return []
+    if recurrence == 'None':
+        after_start = window_start is None or start_date >= window_start
+        before_end = window_end is None or start_date < window_end
+        return [start_date] if after_start and before_end else []
+    interval = RECURRENCE_INTERVALS[recurrence]
+    first = 0 if window_start is None else occurrence_index(start_date, window_start, interval)
+    last = count if window_end is None else min(count, occurrence_index(start_date, window_end, interval))
+    return [start_date + index * interval for index in range(first, last)]
+
 def calculate_lesson_dates(start_date, end_date, recurrence):
-        """Calculate all lesson dates based on recurrence and recurrence_end_date."""
-        try:
-            dates = []
-            current_date = start_date
-            if recurrence == 'None':
-                dates.append(current_date)
-            elif recurrence == 'Daily' or recurrence == 'Weekly' or recurrence == 'Monthly':
-                while current_date.date() <= end_date:
-                    dates.append(current_date)
-                    if recurrence == 'Daily':
-                        current_date += timedelta(days=1)
-                    elif recurrence == 'Weekly':
-                        current_date += timedelta(weeks=1)
-                    elif recurrence == 'Monthly':
-                        current_date += timedelta(days=30)
-            else:
-                raise ValueError('Invalid recurrence value.')
-            return dates
-        except:
-            return []
+    """Calculate all lesson dates based on recurrence and recurrence_end_date."""
+    try:
+        return occurrences_between(start_date, end_date, recurrence)
+    except (TypeError, AttributeError):
+        return []
+
+def month_range(year, month):
+    """Return the aware datetimes bounding the given month as a [start, end) pair."""
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(datetime(year + month // 12, month % 12 + 1, 1))
+    return start, end
+
+def build_month_calendar(year, month, occurrences):
+    """Build the week grid of a month from (start, lesson) pairs in a single pass."""
+    lessons_by_day = {}
+    for start, lesson in occurrences:
+        start = timezone.localtime(start)
+        if start.year == year and start.month == month:
+            lessons_by_day.setdefault(start.day, {})[lesson.pk] = lesson
+
+    first_day_of_month, days_in_month = monthrange(year, month)
+    calendar = []
+    week = [None] * first_day_of_month
+    for day in range(1, days_in_month + 1):
+        week.append({"day": day, "lessons": list(lessons_by_day.get(day, {}).values())})
+        if len(week) == 7:
+            calendar.append(week)
+            week = []
+
+    if week:
+        week.extend([None] * (7 - len(week)))
+        calendar.append(week)
+    return calendar
 
 def days_between(start_date, end_date):
     return (end_date - start_date).days
 
 def calculate_invoice_amount(lesson):
+    """Return the price of every occurrence of the lesson series."""
     if lesson is None:
         return randint(10, 200)
-    if lesson.recurrence == 'None':
-        repetitions = 1
-    elif lesson.recurrence == 'Daily':
-        repetitions = days_between(lesson.date.date(), lesson.recurrence_end_date)
-    elif lesson.recurrence == 'Weekly':
-        repetitions = days_between(lesson.date.date(), lesson.recurrence_end_date) // 7
-    elif lesson.recurrence == 'Monthly':
-        repetitions = days_between(lesson.date.date(), lesson.recurrence_end_date) // 30
-    return lesson.duration * 0.5 * repetitions
+    return lesson.duration * PRICE_PER_MINUTE * occurrence_count(lesson.date, lesson.recurrence_end_date, lesson.recurrence)
 
 def model_is_valid(model):
     try:
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tutorials.models import Lesson, LessonOccurrence
+
+
+class Command(BaseCommand):
+    """Build automation command to rebuild the stored lesson occurrences."""
+
+    help = 'Rebuilds the stored occurrences of every lesson'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of lessons processed per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch = []
+        processed = 0
+        with transaction.atomic():
+            for lesson in Lesson.objects.order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(lesson)
+                if len(batch) == batch_size:
+                    LessonOccurrence.rebuild(batch)
+                    processed += len(batch)
+                    batch = []
+            LessonOccurrence.rebuild(batch)
+            processed += len(batch)
+        self.stdout.write(f"Rebuilt occurrences for {processed} lessons.")
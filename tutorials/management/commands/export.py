@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from tutorials.exports import EXPORTS, FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    """Build automation command to export an admin list."""
+
+    help = 'Streams users, lessons or invoices as CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS), help='List to export')
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv', help='Output format')
+        parser.add_argument('--output', help='File to write to (default: standard output)')
+        parser.add_argument('--filter', action='append', default=[], metavar='KEY=VALUE', help='Admin list filter or search parameter, e.g. paid=False or search=charlie')
+
+    def handle(self, *args, **options):
+        params = {}
+        for item in options['filter']:
+            key, separator, value = item.partition('=')
+            if not separator:
+                raise CommandError(f"Filters must look like KEY=VALUE, not '{item}'.")
+            params[key] = value
+        lines = export_lines(options['name'], options['format'], params)
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from tutorials.billing import invoice_approved_lessons
+
+
+class Command(BaseCommand):
+    """Build automation command to invoice approved lessons."""
+
+    help = 'Creates an invoice for every approved lesson without one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report the invoices without saving them')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of invoices written per insert')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        count, total = invoice_approved_lessons(batch_size=options['batch_size'], commit=not options['dry_run'])
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(f"{verb} {count} invoices totalling £{total}.")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from tutorials.scheduling import match_pending_lessons
+
+
+class Command(BaseCommand):
+    """Build automation command to match pending lessons with available tutors."""
+
+    help = 'Assigns available tutors to every pending lesson and approves them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report the matches without saving them')
+
+    def handle(self, *args, **options):
+        matched, unmatched = match_pending_lessons(commit=not options['dry_run'])
+        self.stdout.write(f"Matched {len(matched)} lessons, {len(unmatched)} left pending.")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from tutorials.notifications import REMINDER_DAYS, send_invoice_reminders
+
+
+class Command(BaseCommand):
+    """Build automation command to remind students of unpaid invoices."""
+
+    help = 'Notifies students of overdue invoices and of invoices due soon; meant to run daily'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=REMINDER_DAYS, help='Remind about invoices due within this many days')
+        parser.add_argument('--dry-run', action='store_true', help='Report the reminders without sending them')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days must not be negative.')
+        overdue, due_soon, skipped = send_invoice_reminders(days=options['days'], commit=not options['dry_run'])
+        verb = 'Would send' if options['dry_run'] else 'Sent'
+        self.stdout.write(f"{verb} {overdue} overdue and {due_soon} due soon reminders, skipped {skipped} already sent.")
@@ -1,16 +1,20 @@
 from django.core.management.base import BaseCommand, CommandError
-from tutorials.models import User, Subject, Lesson, Invoice, Notification
+from tutorials.seeding import reset_database
 
 class Command(BaseCommand):
     """Build automation command to unseed the database."""
     
-    help = 'Seeds the database with sample data'
+    help = 'Removes the seeded data from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-subjects', action='store_true', help='Keep the subjects')
+        parser.add_argument('--keep-admins', action='store_true', help='Keep the admin users')
 
     def handle(self, *args, **options):
         """Unseed the database."""
 
-        User.objects.all().delete()
-        Lesson.objects.all().delete()
-        Subject.objects.all().delete()
-        Invoice.objects.all().delete()
-        Notification.objects.all().delete()
\ No newline at end of file
+        counts = reset_database(keep_subjects=options['keep_subjects'], keep_admins=options['keep_admins'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {counts['users']} users, {counts['lessons']} lessons, {counts['invoices']} invoices, "
+            f"{counts['notifications']} notifications and {counts['subjects']} subjects."
+        ))
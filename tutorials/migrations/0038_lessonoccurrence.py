@@ -0,0 +1,59 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:07
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.db import migrations, models
+
+# Gap between consecutive occurrences of a recurring lesson. The schedule rules
+# are copied here so that replaying the migration does not depend on the
+# application's scheduling code.
+RECURRENCE_INTERVALS = {
+    'Daily': timedelta(days=1),
+    'Weekly': timedelta(weeks=1),
+    'Monthly': timedelta(days=30),
+}
+
+
+def lesson_dates(start, end_date, recurrence):
+    """Return every occurrence of a lesson series, up to and including the end date."""
+    if recurrence == 'None':
+        return [start]
+    interval = RECURRENCE_INTERVALS.get(recurrence)
+    if interval is None or end_date is None or start.date() > end_date:
+        return []
+    count = (end_date - start.date()).days // interval.days + 1
+    return [start + index * interval for index in range(count)]
+
+
+def backfill_occurrences(apps, schema_editor):
+    Lesson = apps.get_model('tutorials', 'Lesson')
+    LessonOccurrence = apps.get_model('tutorials', 'LessonOccurrence')
+    occurrences = [
+        LessonOccurrence(lesson=lesson, start=date, end=date + timedelta(minutes=lesson.duration))
+        for lesson in Lesson.objects.iterator()
+        for date in lesson_dates(lesson.date, lesson.recurrence_end_date, lesson.recurrence)
+    ]
+    LessonOccurrence.objects.bulk_create(occurrences, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0037_alter_invoice_amount_alter_invoice_lesson_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField(db_index=True)),
+                ('end', models.DateTimeField()),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='tutorials.lesson')),
+            ],
+            options={
+                'ordering': ['start'],
+            },
+        ),
+        migrations.RunPython(backfill_occurrences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0038_lessonoccurrence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['paid', 'due_date'], name='invoice_paid_due_date_idx'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0040_notification_user_unread_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invoice',
+            name='lesson',
+            field=models.ForeignKey(db_index=False, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='invoices', to='tutorials.lesson'),
+        ),
+        migrations.AlterField(
+            model_name='lesson',
+            name='student',
+            field=models.ForeignKey(db_index=False, limit_choices_to={'type': 'student'}, on_delete=django.db.models.deletion.CASCADE, related_name='lessons', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='lesson',
+            name='tutor',
+            field=models.ForeignKey(db_index=False, default=None, limit_choices_to={'type': 'tutor'}, null=True, on_delete=django.db.models.deletion.SET_DEFAULT, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='lessonoccurrence',
+            name='lesson',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='tutorials.lesson'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['lesson', 'paid'], name='invoice_lesson_paid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['due_date'], name='invoice_due_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(condition=models.Q(('paid', False)), fields=['student', 'due_date'], name='invoice_unpaid_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['student', 'date'], name='lesson_student_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['tutor', 'date'], name='lesson_tutor_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['status', 'date'], name='lesson_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['date'], name='lesson_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(condition=models.Q(('status', 'Approved')), fields=['student', 'date'], name='lesson_approved_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(condition=models.Q(('status', 'Approved')), fields=['tutor', 'date'], name='lesson_approved_tutor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lessonoccurrence',
+            index=models.Index(fields=['lesson', 'start'], name='occurrence_lesson_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at'], name='notification_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['created_at'], name='notification_created_idx'),
+        ),
+    ]
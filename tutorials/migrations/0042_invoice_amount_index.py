@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0041_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['amount'], name='invoice_amount_idx'),
+        ),
+    ]
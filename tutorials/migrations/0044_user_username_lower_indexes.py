@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:57
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tutorials', '0043_user_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='user_username_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(models.F('type'), django.db.models.functions.text.Lower('username'), name='user_type_username_lower_idx'),
+        ),
+    ]
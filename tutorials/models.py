@@ -1,11 +1,15 @@
 from django.db import models
+from django.db.models import Case, Exists, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Lower, TruncDate
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from libgravatar import Gravatar
 from django.conf import settings
-from tutorials.helpers import calculate_lesson_dates
+from tutorials.helpers import RECURRENCE_INTERVALS, PRICE_PER_MINUTE, calculate_lesson_dates, next_occurrence, occurrences_between
 from django.utils import timezone
+from datetime import timedelta, timezone as dt_timezone
+from decimal import Decimal
 
 
 class Subject(models.Model):
@@ -46,6 +50,16 @@ class User(AbstractUser):
     class Meta:
         """Model options."""
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Default ordering and the name sort keys of the user list
+            models.Index(fields=['last_name', 'first_name'], name='user_last_first_name_idx'),
+            models.Index(fields=['first_name', 'last_name'], name='user_first_last_name_idx'),
+            # Students or tutors by username, for the type sort key
+            models.Index(fields=['type', 'username'], name='user_type_username_idx'),
+            # Case-insensitive username prefix searches of the autocomplete lookups
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+            models.Index(F('type'), Lower('username'), name='user_type_username_lower_idx'),
+        ]
     
     def clean(self):
         super().clean()
@@ -75,6 +89,94 @@ class User(AbstractUser):
         return self.username[1:] if self.username.startswith('@') else self.username
 
 
+# Upper bound on the duration of a single lesson
+LONGEST_LESSON = timedelta(minutes=240)
+
+
+class DaysBetween(models.Func):
+    """Number of whole days from a start date to an end date, computed by the database."""
+    arity = 2
+    output_field = models.IntegerField()
+
+    def __init__(self, start, end, **extra):
+        super().__init__(end, start, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='(%(expressions)s)', arg_joiner=' - ', **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='CAST(julianday(%(expressions)s) AS integer)', arg_joiner=') - julianday(', **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function='DATEDIFF', **extra_context)
+
+
+class WholeDivision(models.Func):
+    """Whole part of the division of two non-negative integers, computed by the database."""
+    arity = 2
+    output_field = models.IntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='(%(expressions)s)', arg_joiner=' / ', **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        # / divides decimally on MySQL
+        return super().as_sql(compiler, connection, template='(%(expressions)s)', arg_joiner=' DIV ', **extra_context)
+
+
+def occurrence_count_expression():
+    """Return a database expression for the number of occurrences of a lesson series.
+
+    It mirrors helpers.occurrence_count, so it agrees with the occurrence engine.
+    """
+    start_date = TruncDate('date', tzinfo=dt_timezone.utc)
+    days = DaysBetween(start_date, F('recurrence_end_date'))
+    return Case(
+        When(recurrence='None', then=Value(1)),
+        When(Q(recurrence_end_date__isnull=True) | Q(recurrence_end_date__lt=start_date), then=Value(0)),
+        *[When(recurrence=recurrence, then=WholeDivision(days, Value(interval.days)) + Value(1)) for recurrence, interval in RECURRENCE_INTERVALS.items()],
+        default=Value(0),
+        output_field=models.IntegerField(),
+    )
+
+
+class LessonQuerySet(models.QuerySet):
+    """Queryset for lessons with schedule aware filters."""
+
+    def upcoming(self, now=None):
+        """Return lessons with an occurrence after now, annotated with their next occurrence."""
+        now = now or timezone.now()
+        next_occurrence = LessonOccurrence.objects.filter(lesson=OuterRef('pk'), start__gt=now).order_by('start').values('start')[:1]
+        return (self.filter(Q(date__gt=now) | Q(recurrence_end_date__gte=now.date()))
+                    .annotate(next_occurrence=Subquery(next_occurrence))
+                    .filter(next_occurrence__isnull=False))
+
+    def overlapping(self, start, end=None):
+        """Return lessons whose series may have an occurrence overlapping [start, end)."""
+        earliest = start - LONGEST_LESSON
+        lessons = self.filter(Q(date__gte=earliest) | Q(recurrence_end_date__gte=earliest.date()))
+        return lessons if end is None else lessons.filter(date__lt=end)
+
+    def with_invoice_amount(self):
+        """Annotate each lesson with its occurrence count and invoice amount, computed in SQL."""
+        return self.annotate(occurrence_total=occurrence_count_expression()).annotate(
+            invoice_amount=ExpressionWrapper(
+                F('duration') * F('occurrence_total') * Value(Decimal(str(PRICE_PER_MINUTE))),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            )
+        )
+
+    def with_billing_status(self):
+        """Annotate each lesson with is_paid, is_invoiced and invoiced_amount using subqueries."""
+        invoices = Invoice.objects.filter(lesson=OuterRef('pk'))
+        invoiced_amount = invoices.order_by().values('lesson').annotate(total=Sum('amount')).values('total')
+        return self.annotate(
+            is_paid=Exists(invoices.filter(paid=True)),
+            is_invoiced=Exists(invoices),
+            invoiced_amount=Coalesce(Subquery(invoiced_amount), Value(Decimal('0')), output_field=models.DecimalField(max_digits=10, decimal_places=2)),
+        )
+
+
 class Lesson(models.Model):
     """Model for lessons for a student given by a tutor on a subject."""
     STATUS_CHOICES = [
@@ -89,15 +191,33 @@ class Lesson(models.Model):
         ('Monthly', 'Monthly'),
     ]
 
-    student = models.ForeignKey(User, limit_choices_to={'type': 'student'}, on_delete=models.CASCADE, related_name="lessons", blank=False)
+    student = models.ForeignKey(User, limit_choices_to={'type': 'student'}, on_delete=models.CASCADE, related_name="lessons", blank=False, db_index=False)
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, blank=False)
-    tutor = models.ForeignKey(User, limit_choices_to={'type': 'tutor'}, on_delete=models.SET_DEFAULT, default=None, null=True)
+    tutor = models.ForeignKey(User, limit_choices_to={'type': 'tutor'}, on_delete=models.SET_DEFAULT, default=None, null=True, db_index=False)
     date = models.DateTimeField()
     duration = models.PositiveIntegerField(validators=[MinValueValidator(30), MaxValueValidator(240), RegexValidator(regex=r'^[1-9][0-9]*[05]$|^[1-9][0-9]*0$', message='Duration must be in 15 minute increments.')])
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     recurrence = models.CharField(max_length=10, choices=RECURRENCE_CHOICES, default='None')
     recurrence_end_date = models.DateField(blank=True, null=True, default=None)
 
+    objects = LessonQuerySet.as_manager()
+
+    class Meta:
+        """Model options."""
+        # student and tutor lead composite indexes, so they have no index of their own
+        indexes = [
+            # Overlap checks and lesson lists of a student or tutor
+            models.Index(fields=['student', 'date'], name='lesson_student_date_idx'),
+            models.Index(fields=['tutor', 'date'], name='lesson_tutor_date_idx'),
+            # Tutor matching, invoicing and the dashboard statistics
+            models.Index(fields=['status', 'date'], name='lesson_status_date_idx'),
+            # Admin lesson list, paginated by date
+            models.Index(fields=['date'], name='lesson_date_idx'),
+            # Dashboards, schedules and upcoming lessons only show approved lessons
+            models.Index(fields=['student', 'date'], condition=Q(status='Approved'), name='lesson_approved_student_idx'),
+            models.Index(fields=['tutor', 'date'], condition=Q(status='Approved'), name='lesson_approved_tutor_idx'),
+        ]
+
     def is_assigned(self):
         """Return True if a tutor has been assigned."""
         return self.tutor is not None
@@ -117,23 +237,36 @@ class Lesson(models.Model):
 
     def next_lesson(self):
         """Return the next lesson date."""
-        for date in self.lesson_dates():
-            if date > timezone.now():
-                return date
-        return None
+        if 'next_occurrence' in self.__dict__:
+            return self.next_occurrence
+        return next_occurrence(self.date, self.recurrence_end_date, self.recurrence, timezone.now(), strict=True)
     next_lesson.short_description = 'Next Lesson'
 
+    def occurrences_between(self, start=None, end=None):
+        """Return the lesson dates starting within [start, end)."""
+        return occurrences_between(self.date, self.recurrence_end_date, self.recurrence, start, end)
+
+    def sync_occurrences(self):
+        """Rebuild the stored occurrences of this lesson."""
+        LessonOccurrence.rebuild([self])
+
     def paid(self):
         """Return True if the lesson has been paid for."""
+        if 'is_paid' in self.__dict__:
+            return self.is_paid
         return Invoice.objects.filter(lesson=self, paid=True).exists()
-    is_assigned.boolean = True
-    is_assigned.short_description = 'Paid?'
+    paid.boolean = True
+    paid.short_description = 'Paid?'
+    paid.admin_order_field = 'is_paid'
 
     def has_invoice(self):
-        """Return True if the lesson has been has an invoice."""
+        """Return True if the lesson has an invoice."""
+        if 'is_invoiced' in self.__dict__:
+            return self.is_invoiced
         return Invoice.objects.filter(lesson=self).exists()
-    is_assigned.boolean = True
-    is_assigned.short_description = 'Invoice?'
+    has_invoice.boolean = True
+    has_invoice.short_description = 'Invoice?'
+    has_invoice.admin_order_field = 'is_invoiced'
 
     def clean(self):
         """Ensure that the lesson date and recurrence end date are valid."""
@@ -144,20 +277,77 @@ class Lesson(models.Model):
         if self.recurrence_end_date and self.date and self.recurrence_end_date < self.date.date():
             raise ValidationError('Recurrence end date must be after the lesson date.')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Load a lesson, remembering its stored tutor so a save can tell whether it changed."""
+        lesson = super().from_db(db, field_names, values)
+        if 'tutor_id' in lesson.__dict__:
+            lesson._loaded_tutor_id = lesson.tutor_id
+        return lesson
+
     def __str__(self):
         return f"{self.subject} with {self.student} on {self.date.strftime('%d/%m/%Y %H:%M')}"
 
 
+class LessonOccurrence(models.Model):
+    """Model for a single, materialised occurrence of a (possibly recurring) lesson."""
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='occurrences', db_index=False)
+    start = models.DateTimeField(db_index=True)
+    end = models.DateTimeField()
+
+    class Meta:
+        """Model options."""
+        ordering = ['start']
+        # lesson leads the index below, so it has no index of its own
+        indexes = [
+            # Next occurrence of a lesson
+            models.Index(fields=['lesson', 'start'], name='occurrence_lesson_start_idx'),
+        ]
+
+    @classmethod
+    def rebuild(cls, lessons, batch_size=1000):
+        """Replace the stored occurrences of the given lessons."""
+        lessons = [lesson for lesson in lessons if lesson.pk is not None]
+        if not lessons:
+            return
+        cls.objects.filter(lesson__in=[lesson.pk for lesson in lessons]).delete()
+        occurrences = [
+            cls(lesson=lesson, start=date, end=date + timedelta(minutes=lesson.duration))
+            for lesson in lessons
+            for date in lesson.lesson_dates()
+        ]
+        cls.objects.bulk_create(occurrences, batch_size=batch_size)
+
+    def __str__(self):
+        return f"{self.lesson.subject} on {self.start.strftime('%d/%m/%Y %H:%M')}"
+
+
 class Invoice(models.Model):
     student = models.ForeignKey(User, limit_choices_to={'type': 'student'}, on_delete=models.CASCADE, related_name='invoices')
-    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, null=True, related_name='invoices', default=None)
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, null=True, related_name='invoices', default=None, db_index=False)
     amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)], default=0)
     due_date = models.DateField()
     paid = models.BooleanField(default=False)
 
-    def is_overdue(self):
+    class Meta:
+        """Model options."""
+        indexes = [
+            # Unpaid invoices by due date, for the payment reminders
+            models.Index(fields=['paid', 'due_date'], name='invoice_paid_due_date_idx'),
+            # Payment state of a lesson's invoices, also serving as the index of the lesson foreign key
+            models.Index(fields=['lesson', 'paid'], name='invoice_lesson_paid_idx'),
+            # Admin invoice list, paginated by due date
+            models.Index(fields=['due_date'], name='invoice_due_date_idx'),
+            # Admin invoice search by amount
+            models.Index(fields=['amount'], name='invoice_amount_idx'),
+            # Overdue invoices of a student
+            models.Index(fields=['student', 'due_date'], condition=Q(paid=False), name='invoice_unpaid_student_idx'),
+        ]
+
+    def is_overdue(self, today=None):
         """Return True if the invoice is overdue."""
-        return not self.paid and self.due_date < timezone.now().date()
+        today = today or timezone.now().date()
+        return not self.paid and self.due_date < today
 
     def clean(self):
         """Ensure that the student matches the lesson student."""
@@ -168,12 +358,34 @@ class Invoice(models.Model):
         return f"Invoice {self.id} for {self.student} - {'Paid' if self.paid else 'Unpaid'}"
 
 
+class NotificationQuerySet(models.QuerySet):
+    """Queryset for notifications."""
+
+    def unread(self):
+        """Return the unread notifications."""
+        # is_read=False compiles to NOT is_read, which SQLite cannot match against the index
+        return self.filter(is_read=Value(False))
+
+
 class Notification(models.Model):
     """Model to store notifications for users."""
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', db_index=False)
     message = models.TextField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
 
+    objects = NotificationQuerySet.as_manager()
+
+    class Meta:
+        """Model options."""
+        # user leads composite indexes, so it has no index of its own
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notification_user_unread_idx'),
+            # Notification list of a user, newest first
+            models.Index(fields=['user', 'created_at'], name='notification_user_created_idx'),
+            # Admin notification list, paginated by creation date
+            models.Index(fields=['created_at'], name='notification_created_idx'),
+        ]
+
     def __str__(self):
         return f"Notification for {self.user.username} - {'Read' if self.is_read else 'Unread'}"
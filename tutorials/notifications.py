@@ -0,0 +1,117 @@
+"""Bulk notification writes."""
+
+from datetime import timedelta
+from itertools import islice
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Value
+from django.utils import timezone
+from tutorials.models import Invoice, Notification
+from tutorials.options import invalidate_filter_options
+from tutorials.stats import invalidate_dashboard_stats
+
+BATCH_SIZE = 1000
+REMINDER_DAYS = 3
+# Number of unread notifications listed on the dashboards
+DASHBOARD_NOTIFICATIONS = 5
+# How long a user's unread notification count is kept in the cache, in seconds
+UNREAD_COUNT_TIMEOUT = 300
+
+
+def unread_count_cache_key(user_id):
+    return f'unread_notifications:{user_id}'
+
+def unread_count(user_id):
+    """Return the number of unread notifications of a user, counting them when the cache is cold."""
+    key = unread_count_cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id).unread().count()
+        cache.set(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+def invalidate_unread_counts(user_ids):
+    """Drop the cached unread notification counts of the given users."""
+    cache.delete_many([unread_count_cache_key(user_id) for user_id in user_ids if user_id is not None])
+
+def invalidate_unread_counts_on_commit(user_ids):
+    """Drop the cached unread counts of the given users once the current transaction commits.
+
+    Dropping them earlier would let a request recount the uncommitted rows'
+    old state and cache it again.
+    """
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: invalidate_unread_counts(user_ids))
+
+def broadcast(recipients, message, batch_size=BATCH_SIZE):
+    """Send the message to every user of the recipients queryset and return how many were sent.
+
+    Recipient ids are streamed and the notifications written with batched
+    bulk_create, all in one transaction.
+    """
+    count = 0
+    with transaction.atomic():
+        iterator = recipients.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size)
+        while user_ids := list(islice(iterator, batch_size)):
+            Notification.objects.bulk_create([Notification(user_id=user_id, message=message) for user_id in user_ids])
+            invalidate_unread_counts_on_commit(user_ids)
+            count += len(user_ids)
+    if count:
+        invalidate_dashboard_stats()
+        invalidate_filter_options(Notification)
+    return count
+
+def invoice_message(invoice, today=None):
+    """Return the notification text describing the payment state of an invoice."""
+    if invoice.paid:
+        return f"Your invoice {invoice.pk} for {invoice.amount} has been paid"
+    if invoice.is_overdue(today):
+        return f"You have failed to pay your invoice {invoice.pk} for {invoice.amount} before {invoice.due_date.strftime('%d/%m/%Y')} and it is now overdue, which may affect your ability to book lessons"
+    return f"Reminder: Please pay your invoice {invoice.pk} for {invoice.amount} before {invoice.due_date.strftime('%d/%m/%Y')}"
+
+def send_invoice_reminders(days=REMINDER_DAYS, today=None, batch_size=BATCH_SIZE, commit=True):
+    """Notify the students of unpaid invoices that are overdue or due within days.
+
+    Invoices are found with one query on the (paid, due_date) index. A
+    reminder whose exact text the student already received is skipped, so
+    running the job repeatedly sends each reminder once. Returns the number
+    of overdue and soon due reminders sent, and of reminders skipped.
+    """
+    today = today or timezone.now().date()
+    # paid=False compiles to NOT paid, which SQLite cannot match against the index
+    invoices = (Invoice.objects.filter(paid=Value(False), due_date__lte=today + timedelta(days=days))
+                .only('pk', 'student_id', 'amount', 'due_date', 'paid').order_by('pk'))
+    totals = [0, 0, 0]
+    with transaction.atomic():
+        iterator = invoices.iterator(chunk_size=batch_size)
+        while batch := list(islice(iterator, batch_size)):
+            totals = [total + count for total, count in zip(totals, _send_reminders(batch, today, commit))]
+    overdue, due_soon, skipped = totals
+    if commit and overdue + due_soon:
+        invalidate_dashboard_stats()
+        invalidate_filter_options(Notification)
+    return overdue, due_soon, skipped
+
+def _send_reminders(invoices, today, commit):
+    """Write the reminders of a batch of invoices that were not sent before."""
+    reminders = [(invoice.student_id, invoice_message(invoice, today), invoice.is_overdue(today)) for invoice in invoices]
+    sent = set(Notification.objects.filter(
+        user_id__in={user_id for user_id, _, _ in reminders},
+        message__in={message for _, message, _ in reminders},
+    ).values_list('user_id', 'message'))
+    notifications = []
+    overdue, due_soon, skipped = 0, 0, 0
+    for user_id, message, is_overdue in reminders:
+        if (user_id, message) in sent:
+            skipped += 1
+            continue
+        sent.add((user_id, message))
+        notifications.append(Notification(user_id=user_id, message=message))
+        if is_overdue:
+            overdue += 1
+        else:
+            due_soon += 1
+    if commit:
+        Notification.objects.bulk_create(notifications)
+        invalidate_unread_counts_on_commit({notification.user_id for notification in notifications})
+    return overdue, due_soon, skipped
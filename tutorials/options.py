@@ -0,0 +1,101 @@
+"""Cached option sets of the admin list filter dropdowns."""
+
+import time
+from django.core.cache import cache
+from django.db.models import F, Value
+from django.utils import timezone
+from tutorials.models import User, Subject, Lesson, Invoice, Notification
+
+# How long the dropdown options are kept in the cache, in seconds. Lessons move
+# into the past without being saved, so the lesson options also expire.
+FILTER_OPTIONS_TIMEOUT = 300
+
+# Models, and the fields of them, whose changes alter the options of each list
+FILTER_OPTION_SOURCES = {
+    'lessons': {
+        Lesson: {'student', 'tutor', 'subject', 'duration', 'recurrence', 'date'},
+        User: {'username'},
+        Subject: {'name'},
+    },
+    'invoices': {
+        Invoice: {'student'},
+        User: {'username'},
+    },
+    'notifications': {
+        Notification: {'user'},
+        User: {'username'},
+    },
+}
+
+
+def option_rows(kind, queryset, number, text):
+    """Return (kind, number, text) rows of a queryset, to be combined with union."""
+    return queryset.annotate(kind=Value(kind), number=number, text=text).values_list('kind', 'number', 'text')
+
+def compute_lesson_options(now=None):
+    """Return the students, subjects, tutors, durations and recurrences of upcoming lessons in one query."""
+    lessons = Lesson.objects.filter(date__gte=now or timezone.now()).order_by()
+    rows = option_rows('student', lessons, F('student_id'), F('student__username')).union(
+        option_rows('subject', lessons, F('subject_id'), F('subject__name')),
+        option_rows('tutor', lessons.filter(tutor__isnull=False), F('tutor_id'), F('tutor__username')),
+        option_rows('duration', lessons, F('duration'), Value('')),
+        option_rows('recurrence', lessons, Value(0), F('recurrence')),
+    )
+    found = {'student': [], 'subject': [], 'tutor': [], 'duration': [], 'recurrence': []}
+    for kind, number, text in rows:
+        found[kind].append((number, text))
+    return {
+        'students_with_lessons': sorted((User(pk=pk, username=username) for pk, username in found['student']), key=lambda user: user.username),
+        'subjects': sorted((Subject(pk=pk, name=name) for pk, name in found['subject']), key=lambda subject: subject.name),
+        'tutors_with_lessons': sorted((User(pk=pk, username=username) for pk, username in found['tutor']), key=lambda user: user.username),
+        'durations': sorted(duration for duration, _ in found['duration']),
+        'recurrences': sorted(recurrence for _, recurrence in found['recurrence']),
+    }
+
+def users_of(queryset, field):
+    """Return the distinct users referenced by a field of a queryset, as unsaved User instances ordered by username."""
+    rows = queryset.order_by(f'{field}__username').values_list(field, f'{field}__username').distinct()
+    return [User(pk=pk, username=username) for pk, username in rows]
+
+def compute_invoice_options():
+    return {'students': users_of(Invoice.objects.all(), 'student')}
+
+def compute_notification_options():
+    return {'users': users_of(Notification.objects.all(), 'user')}
+
+OPTION_BUILDERS = {
+    'lessons': compute_lesson_options,
+    'invoices': compute_invoice_options,
+    'notifications': compute_notification_options,
+}
+
+def filter_options_version_key(name):
+    return f'filter_options_version:{name}'
+
+def filter_options_cache_key(name):
+    """Return the cache key of a list's current options version.
+
+    Versions start from the clock, so a version key lost from the cache never
+    restarts at a number whose options may still be cached.
+    """
+    version = cache.get_or_set(filter_options_version_key(name), lambda: time.time_ns() // 1000, None)
+    return f'filter_options:{name}:{version}'
+
+def filter_options(name):
+    """Return the dropdown options of an admin list, computing them when the cache is cold."""
+    key = filter_options_cache_key(name)
+    options = cache.get(key)
+    if options is None:
+        options = OPTION_BUILDERS[name]()
+        cache.set(key, options, FILTER_OPTIONS_TIMEOUT)
+    return options
+
+def invalidate_filter_options(*models):
+    """Move the lists whose options depend on any of the models to a new options version."""
+    for name, sources in FILTER_OPTION_SOURCES.items():
+        if sources.keys() & set(models):
+            try:
+                cache.incr(filter_options_version_key(name))
+            except ValueError:
+                # No version yet, the next read starts a new one
+                pass
@@ -0,0 +1,114 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+# Upper bound for the page_size query parameter
+MAX_PAGE_SIZE = 200
+
+
+def get_page_size(request):
+    """Return the page size requested in the query string, within sensible bounds."""
+    default = getattr(settings, 'ADMIN_LIST_PAGE_SIZE', 25)
+    try:
+        page_size = int(request.GET.get('page_size', default))
+    except ValueError:
+        page_size = default
+    return min(max(page_size, 1), MAX_PAGE_SIZE)
+
+def encode_cursor(obj, field):
+    """Return an opaque cursor pointing at an object's position in a keyset ordering."""
+    value = getattr(obj, field)
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    position = json.dumps([value, obj.pk])
+    return urlsafe_b64encode(position.encode()).decode()
+
+def decode_cursor(cursor, field=None):
+    """Return the (value, pk) position stored in a cursor, or None if it is malformed.
+
+    Given the model field the cursor orders by, the value is converted with the
+    field's to_python, and a cursor whose value the field rejects is malformed.
+    """
+    try:
+        value, pk = json.loads(urlsafe_b64decode(cursor.encode()))
+        if field is not None:
+            value = field.to_python(value)
+        if value is None:
+            return None
+        return value, int(pk)
+    except (Base64Error, ValidationError, ValueError, TypeError):
+        return None
+
+
+class KeysetPage:
+    """A page of results fetched by seeking past a cursor instead of using OFFSET."""
+
+    paginator = None
+
+    def __init__(self, object_list, field, has_next, has_previous):
+        self.object_list = object_list
+        self.next_cursor = encode_cursor(object_list[-1], field) if has_next and object_list else None
+        self.previous_cursor = encode_cursor(object_list[0], field) if has_previous and object_list else None
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+def keyset_paginate(queryset, order_by, page_size, after=None, before=None):
+    """Return the page of a queryset following the after cursor, or preceding the before cursor.
+
+    Rows are ordered by the order_by field with the primary key as a tiebreaker, so a
+    cursor is the (value, pk) pair of the row it points at. A malformed or stale
+    cursor returns the first page.
+    """
+    field = order_by.lstrip('-')
+    descending = order_by.startswith('-')
+    cursor = decode_cursor(before or after, queryset.model._meta.get_field(field)) if (before or after) else None
+    backwards = cursor is not None and bool(before)
+    scan_descending = descending != backwards
+    if cursor is not None:
+        value, pk = cursor
+        lookup = 'lt' if scan_descending else 'gt'
+        queryset = queryset.filter(Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'pk__{lookup}': pk}))
+    prefix = '-' if scan_descending else ''
+    rows = list(queryset.order_by(f'{prefix}{field}', f'{prefix}pk')[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+        return KeysetPage(rows, field, has_next=True, has_previous=has_more)
+    return KeysetPage(rows, field, has_next=has_more, has_previous=cursor is not None)
+
+def paginate(request, queryset, order_by, keyset_fields=()):
+    """Return the requested page of a queryset in the given order.
+
+    order_by is a field or a list of fields. Orderings on a single keyset field
+    are paginated with after/before cursors, any other ordering falls back to
+    numbered pages. The primary key, in the direction of the first field,
+    breaks ties.
+    """
+    page_size = get_page_size(request)
+    fields = [order_by] if isinstance(order_by, str) else list(order_by)
+    if len(fields) == 1 and fields[0].lstrip('-') in keyset_fields:
+        return keyset_paginate(queryset, fields[0], page_size, request.GET.get('after'), request.GET.get('before'))
+    tiebreaker = '-pk' if fields[0].startswith('-') else 'pk'
+    return Paginator(queryset.order_by(*fields, tiebreaker), page_size).get_page(request.GET.get('page'))
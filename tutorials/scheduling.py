@@ -0,0 +1,191 @@
+from bisect import bisect_left
+from datetime import timedelta
+from itertools import accumulate
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from tutorials.models import Lesson, User, LONGEST_LESSON
+from tutorials.options import invalidate_filter_options
+from tutorials.stats import invalidate_dashboard_stats
+
+# How long a tutor's availability index is kept in the cache, in seconds
+AVAILABILITY_CACHE_TIMEOUT = 300
+
+def occurrence_intervals(lessons, start, end):
+    """Return (start, end, lesson) intervals for the lesson occurrences overlapping [start, end)."""
+    intervals = []
+    for lesson in lessons:
+        length = timedelta(minutes=lesson.duration)
+        for date in lesson.occurrences_between(start - length, end):
+            intervals.append((date, date + length, lesson))
+    return intervals
+
+def find_overlaps(candidates, existing):
+    """Return (candidate, interval) pairs of overlapping (start, end, item) intervals using a sorted sweep."""
+    candidates = sorted(candidates, key=lambda interval: interval[0])
+    existing = sorted(existing, key=lambda interval: interval[0])
+    overlaps = []
+    active = []
+    index = 0
+    for candidate in candidates:
+        start, end = candidate[0], candidate[1]
+        while index < len(existing) and existing[index][0] < end:
+            active.append(existing[index])
+            index += 1
+        active = [interval for interval in active if interval[1] > start]
+        overlaps.extend((candidate, interval) for interval in active if interval[0] < end)
+    return overlaps
+
+def lesson_conflicts(lessons, dates, duration):
+    """Return (date, lesson, lesson_date) triples where the given lessons clash with a series of dates."""
+    if not dates or not duration:
+        return []
+    length = timedelta(minutes=duration)
+    candidates = [(date, date + length, None) for date in dates]
+    span_start = min(date for date in dates)
+    span_end = max(date for date in dates) + length
+    existing = occurrence_intervals(lessons.overlapping(span_start, span_end).select_related('subject'), span_start, span_end)
+    return [(candidate[0], interval[2], interval[0]) for candidate, interval in find_overlaps(candidates, existing)]
+
+
+class AvailabilityIndex:
+    """Index of a tutor's booked occurrences answering "is this slot free" in logarithmic time.
+
+    Occurrences are kept sorted by start alongside the running maximum of their ends, so
+    the occurrences starting before a slot ends are a prefix whose latest end decides
+    whether any of them reaches into the slot.
+    """
+
+    def __init__(self, intervals=()):
+        intervals = sorted(intervals)
+        self.starts = [start for start, end in intervals]
+        self.max_ends = list(accumulate((end for start, end in intervals), max))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def is_free(self, start, end):
+        """Return True if no booked occurrence overlaps [start, end)."""
+        index = bisect_left(self.starts, end)
+        return index == 0 or self.max_ends[index - 1] <= start
+
+    def is_free_for(self, dates, duration):
+        """Return True if every occurrence of a series is free."""
+        length = timedelta(minutes=duration)
+        return all(self.is_free(date, date + length) for date in dates)
+
+    def add(self, start, end):
+        """Book an occurrence."""
+        index = bisect_left(self.starts, start)
+        self.starts.insert(index, start)
+        previous = self.max_ends[index - 1] if index else end
+        self.max_ends.insert(index, max(previous, end))
+        for position in range(index + 1, len(self.max_ends)):
+            if self.max_ends[position] >= end:
+                break
+            self.max_ends[position] = end
+
+    def add_series(self, dates, duration):
+        """Book every occurrence of a series."""
+        length = timedelta(minutes=duration)
+        for date in dates:
+            self.add(date, date + length)
+
+
+def availability_cache_key(tutor_id):
+    return f'tutor_availability:{tutor_id}'
+
+def build_availability_indexes(user_ids, since=None, lessons=None, field='tutor'):
+    """Build the availability indexes of several tutors (or students) from their lessons in one query."""
+    since = (since or timezone.now()) - LONGEST_LESSON
+    lessons = Lesson.objects.exclude(status='Rejected') if lessons is None else lessons
+    intervals = {user_id: [] for user_id in user_ids}
+    for lesson in lessons.filter(**{f'{field}__in': user_ids}).overlapping(since):
+        length = timedelta(minutes=lesson.duration)
+        intervals[getattr(lesson, f'{field}_id')].extend((date, date + length) for date in lesson.occurrences_between(since))
+    return {user_id: AvailabilityIndex(user_intervals) for user_id, user_intervals in intervals.items()}
+
+def availability_indexes(tutor_ids):
+    """Return the cached availability indexes of the given tutors, building any missing ones.
+
+    An index covers the occurrences booked from the moment it was built onwards.
+    """
+    keys = {availability_cache_key(tutor_id): tutor_id for tutor_id in tutor_ids}
+    indexes = {keys[key]: index for key, index in cache.get_many(keys).items()}
+    missing = [tutor_id for tutor_id in tutor_ids if tutor_id not in indexes]
+    if missing:
+        built = build_availability_indexes(missing)
+        cache.set_many({availability_cache_key(tutor_id): index for tutor_id, index in built.items()}, AVAILABILITY_CACHE_TIMEOUT)
+        indexes.update(built)
+    return indexes
+
+def invalidate_availability(tutor_ids):
+    """Drop the cached availability indexes of the given tutors."""
+    cache.delete_many([availability_cache_key(tutor_id) for tutor_id in tutor_ids if tutor_id is not None])
+
+def tutor_is_free(tutor, dates, duration, exclude=None, index=None):
+    """Return True if the tutor has no booked occurrence overlapping the series.
+
+    The lesson being edited, if any, is passed as exclude so it does not clash with itself.
+    """
+    if exclude is not None and exclude.pk is not None and exclude.tutor_id == tutor.pk:
+        bookings = Lesson.objects.filter(tutor=tutor).exclude(status='Rejected').exclude(pk=exclude.pk)
+        return not lesson_conflicts(bookings, dates, duration)
+    if index is None:
+        index = availability_indexes([tutor.pk])[tutor.pk]
+    return index.is_free_for(dates, duration)
+
+def available_tutors(subject, dates, duration, exclude=None):
+    """Return the tutors teaching the subject who are free for every occurrence of the series."""
+    tutors = list(User.objects.filter(type='tutor', subjects=subject).order_by('username'))
+    if not dates or not duration:
+        return tutors
+    indexes = availability_indexes([tutor.pk for tutor in tutors])
+    return [tutor for tutor in tutors if tutor_is_free(tutor, dates, duration, exclude, indexes[tutor.pk])]
+
+def match_pending_lessons(lessons=None, now=None, commit=True):
+    """Assign free tutors teaching the subject to pending lessons and approve them.
+
+    Lessons are matched greedily in date order, each to the free tutor with the fewest
+    bookings (keeping a tutor already chosen by the student when they are free), and
+    only approved lessons count as bookings. All assignments are written in a single
+    transaction. Returns the matched and unmatched lessons.
+    """
+    now = now or timezone.now()
+    lessons = Lesson.objects.all() if lessons is None else lessons
+    pending = list(lessons.filter(status='Pending').overlapping(now).order_by('date', 'pk'))
+    tutors_by_subject = {}
+    for subject_id, tutor_id in User.subjects.through.objects.filter(user__type='tutor').values_list('subject_id', 'user_id'):
+        tutors_by_subject.setdefault(subject_id, []).append(tutor_id)
+    tutor_ids = {tutor_id for subject_tutors in tutors_by_subject.values() for tutor_id in subject_tutors}
+    bookings = Lesson.objects.filter(status='Approved')
+    tutor_indexes = build_availability_indexes(tutor_ids, now, bookings)
+    student_indexes = build_availability_indexes({lesson.student_id for lesson in pending}, now, bookings, field='student')
+
+    matched, unmatched, previous_tutors = [], [], set()
+    for lesson in pending:
+        dates = lesson.occurrences_between(now)
+        free_tutors = []
+        if dates and student_indexes[lesson.student_id].is_free_for(dates, lesson.duration):
+            free_tutors = [tutor_id for tutor_id in tutors_by_subject.get(lesson.subject_id, []) if tutor_indexes[tutor_id].is_free_for(dates, lesson.duration)]
+        if not free_tutors:
+            unmatched.append(lesson)
+            continue
+        if lesson.tutor_id in free_tutors:
+            tutor_id = lesson.tutor_id
+        else:
+            tutor_id = min(free_tutors, key=lambda free_tutor: len(tutor_indexes[free_tutor]))
+        tutor_indexes[tutor_id].add_series(dates, lesson.duration)
+        student_indexes[lesson.student_id].add_series(dates, lesson.duration)
+        previous_tutors.add(lesson.tutor_id)
+        lesson.tutor_id = tutor_id
+        lesson.status = 'Approved'
+        matched.append(lesson)
+
+    if commit and matched:
+        with transaction.atomic():
+            Lesson.objects.bulk_update(matched, ['tutor', 'status'], batch_size=500)
+        invalidate_availability(previous_tutors | {lesson.tutor_id for lesson in matched})
+        invalidate_dashboard_stats()
+        invalidate_filter_options(Lesson)
+    return matched, unmatched
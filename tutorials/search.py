@@ -0,0 +1,119 @@
+"""Indexed text search for the admin list search boxes.
+
+Searchable columns are indexed in the database itself so that every write,
+including bulk_create and raw SQL, keeps the index current. On SQLite each
+searchable table gets an external content FTS5 table with the trigram
+tokenizer, kept in sync by triggers. On PostgreSQL the columns get pg_trgm
+GIN indexes which serve the icontains lookups directly. Other databases, and
+queries shorter than a trigram, fall back to plain icontains lookups.
+
+Searches never join: related rows are matched by searching their own table
+and filtering on the foreign key.
+"""
+
+from functools import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Case, Q, Value, When
+from django.db.models.expressions import RawSQL
+from tutorials.models import User, Notification
+
+# Columns indexed for search, per model
+SEARCH_COLUMNS = {
+    User: ['username', 'email', 'first_name', 'last_name'],
+    Notification: ['message'],
+}
+# Shortest query the trigram indexes can answer
+MIN_TRIGRAM_LENGTH = 3
+
+
+def search_table(model):
+    return f'{model._meta.db_table}_search'
+
+@cache
+def sqlite_supports_trigram(alias=DEFAULT_DB_ALIAS):
+    """Return True if the SQLite library has FTS5 and its trigram tokenizer (3.34+)."""
+    connection = connections[alias]
+    if connection.Database.sqlite_version_info < (3, 34):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return 'ENABLE_FTS5' in {row[0] for row in cursor.fetchall()}
+
+def uses_fts(alias=DEFAULT_DB_ALIAS):
+    return connections[alias].vendor == 'sqlite' and sqlite_supports_trigram(alias)
+
+def fts_statements(model):
+    """Return the statements creating a model's FTS5 table and the triggers syncing it."""
+    table, base = search_table(model), model._meta.db_table
+    columns = [model._meta.get_field(name).column for name in SEARCH_COLUMNS[model]]
+    names = ', '.join(f'"{column}"' for column in columns)
+    new = ', '.join(f'new."{column}"' for column in columns)
+    old = ', '.join(f'old."{column}"' for column in columns)
+    delete = f'INSERT INTO "{table}" ("{table}", rowid, {names}) VALUES (\'delete\', old.id, {old});'
+    insert = f'INSERT INTO "{table}" (rowid, {names}) VALUES (new.id, {new});'
+    return [
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS "{table}" USING fts5({names}, content="{base}", content_rowid="id", tokenize="trigram")',
+        f'CREATE TRIGGER IF NOT EXISTS "{table}_insert" AFTER INSERT ON "{base}" BEGIN {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS "{table}_delete" AFTER DELETE ON "{base}" BEGIN {delete} END',
+        f'CREATE TRIGGER IF NOT EXISTS "{table}_update" AFTER UPDATE OF {names} ON "{base}" BEGIN {delete} {insert} END',
+    ]
+
+def trigram_index_statements(model):
+    """Return the statements creating a model's pg_trgm indexes, matching the icontains SQL."""
+    base = model._meta.db_table
+    statements = []
+    for name in SEARCH_COLUMNS[model]:
+        column = model._meta.get_field(name).column
+        statements.append(f'CREATE INDEX IF NOT EXISTS "{base}_{column}_trgm" ON "{base}" USING gin ((UPPER("{column}"::text)) gin_trgm_ops)')
+    return statements
+
+def install_search_indexes(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Create the search indexes that are missing, rebuilding any FTS table whose triggers were lost.
+
+    Connected to post_migrate, as SQLite drops the triggers of a table that a
+    migration rebuilds.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if uses_fts(using):
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            triggers = {name for name, in cursor.fetchall()}
+            for model in SEARCH_COLUMNS:
+                table = search_table(model)
+                if {f'{table}_insert', f'{table}_delete', f'{table}_update'} <= triggers:
+                    continue
+                for statement in fts_statements(model):
+                    cursor.execute(statement)
+                cursor.execute(f'INSERT INTO "{table}" ("{table}") VALUES (\'rebuild\')')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for model in SEARCH_COLUMNS:
+                for statement in trigram_index_statements(model):
+                    cursor.execute(statement)
+
+def fts_query(query, columns):
+    """Return an FTS5 query matching the text as a substring of any of the columns."""
+    phrase = '"' + query.replace('"', '""') + '"'
+    return '{' + ' '.join(columns) + '} : ' + phrase
+
+def matching(model, query, fields=None):
+    """Return the primary keys of the rows whose fields contain the query, for use with __in.
+
+    fields defaults to all the searchable columns of the model.
+    """
+    fields = fields or SEARCH_COLUMNS[model]
+    if uses_fts() and len(query) >= MIN_TRIGRAM_LENGTH:
+        table = search_table(model)
+        columns = [model._meta.get_field(name).column for name in fields]
+        return RawSQL(f'SELECT rowid FROM "{table}" WHERE "{table}" MATCH %s', [fts_query(query, columns)])
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': query})
+    return model.objects.filter(condition).values('pk')
+
+def prefix_rank(query, fields=('username', 'email')):
+    """Return an expression ranking rows whose fields start with the query (0) before the others (1)."""
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__istartswith': query})
+    return Case(When(condition, then=Value(0)), default=Value(1))
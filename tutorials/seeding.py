@@ -0,0 +1,435 @@
+"""Engine that builds seed data in memory and writes it with bulk inserts.
+
+Rows are generated in chunks by plain functions that only return tuples,
+so the chunks can be generated in a process pool while the calling
+process writes them to the database. Each chunk draws from its own
+random generator, seeded from the run seed and the chunk position, so a
+seeded run produces the same data whatever the number of workers.
+"""
+
+import django
+import multiprocessing
+import pytz
+import re
+from datetime import datetime, timedelta
+from random import Random
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from tutorials.autocomplete import invalidate_autocomplete
+from tutorials.helpers import calculate_invoice_amount
+from tutorials.models import User, Subject, Lesson, LessonOccurrence, Invoice, Notification
+from tutorials.notifications import invalidate_unread_counts
+from tutorials.options import invalidate_filter_options
+from tutorials.scheduling import invalidate_availability
+from tutorials.stats import invalidate_dashboard_stats
+
+DEFAULT_PASSWORD = 'Password123'
+BATCH_SIZE = 1000
+USER_TYPES = (['admin', 'tutor', 'student'], [3, 12, 85])
+LESSON_STATUSES = (['Pending', 'Approved', 'Rejected'], [2, 1, 1])
+LESSON_RECURRENCES = (['None', 'Daily', 'Weekly', 'Monthly'], [80, 1, 10, 10])
+YEAR_IN_SECONDS = 365 * 24 * 60 * 60
+
+USER_FIXTURES = [
+    {'username': '@johndoe', 'email': 'john.doe@example.org', 'first_name': 'John', 'last_name': 'Doe', 'type': 'admin'},
+    {'username': '@janedoe', 'email': 'jane.doe@example.org', 'first_name': 'Jane', 'last_name': 'Doe', 'type': 'tutor', 'subjects': ['Python', 'Java']},
+    {'username': '@charlie', 'email': 'charlie.johnson@example.org', 'first_name': 'Charlie', 'last_name': 'Johnson', 'type': 'student'},
+]
+
+_faker = None
+
+
+def create_username(first_name, last_name, index):
+    """Return a username that is unique for the given index and fits the username field."""
+    suffix = str(index)
+    name = re.sub(r'[^a-z]', '', (first_name + last_name).lower())
+    return '@' + name[:29 - len(suffix)] + suffix
+
+def create_email(first_name, last_name, index):
+    """Return an email address that is unique for the given index."""
+    first_name = re.sub(r'[^A-Za-z]', '', first_name)
+    last_name = re.sub(r'[^A-Za-z]', '', last_name)
+    return f"{first_name}.{last_name}{index}@example.org"
+
+def batched(items, batch_size):
+    """Yield successive slices of at most batch_size items."""
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+def chunks(total, size):
+    """Yield (start, count) pairs covering range(total) in chunks of at most size."""
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+def chunk_random(seed, kind, start):
+    """Return the random generator of the chunk of kind rows beginning at start."""
+    return Random(f"{seed}:{kind}:{start}")
+
+def chunk_faker(seed, kind, start):
+    """Return the process wide Faker instance, seeded for the given chunk."""
+    global _faker
+    if _faker is None:
+        _faker = Faker('en_GB')
+    _faker.seed_instance(f"{seed}:{kind}:{start}")
+    return _faker
+
+def delete_rows(queryset):
+    """Delete the rows of queryset with a single DELETE statement.
+
+    Unlike QuerySet.delete() this neither collects related rows nor sends
+    signals, so dependent rows must be deleted first.
+    """
+    model = queryset.model
+    sql, params = queryset.values('pk').query.sql_with_params()
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({sql})", params)
+
+def user_dependents():
+    """Return (model, field name) for every model with a foreign key to users."""
+    dependents = [(relation.related_model, relation.field.name) for relation in User._meta.related_objects if relation.one_to_many]
+    dependents.extend((field.remote_field.through, field.m2m_field_name()) for field in User._meta.many_to_many)
+    return dependents
+
+def reset_database(keep_subjects=False, keep_admins=False):
+    """Delete the seeded data in one transaction and return the rows removed per model.
+
+    Whole tables are emptied with the backend's flush statements, which
+    truncate where the backend supports it and reset the primary key
+    sequences of the emptied tables, instead of QuerySet.delete(),
+    which loads every related row to emulate CASCADE and SET_DEFAULT. With
+    keep_admins the other users and their dependent rows are removed with
+    one DELETE statement per table.
+    """
+    users = User.objects.exclude(type='admin') if keep_admins else User.objects.all()
+    counts = {
+        'users': users.count(),
+        'lessons': Lesson.objects.count(),
+        'invoices': Invoice.objects.count(),
+        'notifications': Notification.objects.count(),
+        'subjects': 0 if keep_subjects else Subject.objects.count(),
+    }
+    tutors = list(User.objects.filter(type='tutor').values_list('pk', flat=True))
+    # Flushing resets the primary key sequences, so new users may reuse these ids
+    # and their cached data is dropped below
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    flushed = [LessonOccurrence, Invoice, Notification, Lesson]
+    if not keep_subjects:
+        flushed += [User.subjects.through, Subject]
+    if not keep_admins:
+        flushed += [model for model, _ in user_dependents()] + [User]
+    tables = list(dict.fromkeys(model._meta.db_table for model in flushed))
+    with transaction.atomic():
+        connection.ops.execute_sql_flush(connection.ops.sql_flush(no_style(), tables, reset_sequences=True))
+        if keep_admins:
+            for model, field in user_dependents():
+                if model not in flushed:
+                    delete_rows(model.objects.filter(**{f'{field}__in': users.values('pk')}))
+            delete_rows(users)
+    invalidate_dashboard_stats()
+    invalidate_availability(tutors)
+    invalidate_unread_counts(user_ids)
+    invalidate_filter_options(User, Subject, Lesson, Invoice, Notification)
+    invalidate_autocomplete(User, Subject, Lesson)
+    return counts
+
+def run_task(task):
+    """Call a chunk generator; used as the process pool entry point."""
+    function, args = task
+    return function(*args)
+
+
+# Chunk generators
+def generate_users(seed, start, count, offset, subject_count):
+    """Return user rows for the user indexes start to start + count.
+
+    Each row is (username, email, first_name, last_name, type, subject indexes).
+    """
+    rng = chunk_random(seed, 'users', start)
+    faker = chunk_faker(seed, 'users', start)
+    rows = []
+    for index in range(start, start + count):
+        first_name = faker.first_name()
+        last_name = faker.last_name()
+        type = rng.choices(*USER_TYPES, k=1)[0]
+        subjects = []
+        if type == 'tutor':
+            subjects = rng.sample(range(subject_count), k=rng.randint(1, subject_count))
+        rows.append((
+            create_username(first_name, last_name, offset + index),
+            create_email(first_name, last_name, offset + index),
+            first_name, last_name, type, subjects,
+        ))
+    return rows
+
+def generate_lessons(seed, start, count, per_student, student_count, tutor_count, subject_count, now):
+    """Return lesson rows for a chunk of students or of lessons.
+
+    With per_student, start and count select students that each get 2 to 10
+    lessons; otherwise they select lessons given to random students. Each
+    row is (student index, subject index, tutor index, date, duration,
+    status, recurrence, recurrence end date, occurrences, invoice), where
+    occurrences are (start, end) pairs already prepared for the database
+    and invoice is None or (amount, due date, paid).
+    """
+    rng = chunk_random(seed, 'lessons', start)
+    field = LessonOccurrence._meta.get_field('start')
+    if per_student:
+        owners = [student for student in range(start, start + count) for _ in range(rng.randint(2, 10))]
+    else:
+        owners = [rng.randrange(student_count) for _ in range(count)]
+    rows = []
+    for student in owners:
+        date = now + timedelta(seconds=rng.randint(-YEAR_IN_SECONDS, YEAR_IN_SECONDS))
+        recurrence = rng.choices(*LESSON_RECURRENCES, k=1)[0]
+        recurrence_end_date = None
+        if recurrence != 'None':
+            recurrence_end_date = (date + timedelta(days=rng.randint(1, 365))).date()
+        lesson = Lesson(date=date, duration=rng.randint(2, 16) * 15, recurrence=recurrence, recurrence_end_date=recurrence_end_date)
+        subject = rng.randrange(subject_count)
+        tutor = rng.randrange(tutor_count)
+        status = rng.choices(*LESSON_STATUSES, k=1)[0]
+        invoice = None
+        if status == 'Approved':
+            invoice = (calculate_invoice_amount(lesson), (date + timedelta(days=rng.randint(-10, 20))).date(), rng.random() < 0.5)
+        length = timedelta(minutes=lesson.duration)
+        occurrences = [
+            (field.get_db_prep_save(occurrence, connection), field.get_db_prep_save(occurrence + length, connection))
+            for occurrence in lesson.lesson_dates()
+        ]
+        rows.append((
+            student, subject, tutor, date, lesson.duration, status,
+            recurrence, recurrence_end_date, occurrences, invoice,
+        ))
+    return rows
+
+def generate_notifications(seed, start, count):
+    """Return (user index, message, is_read) rows, 1 to 4 per user index."""
+    rng = chunk_random(seed, 'notifications', start)
+    faker = chunk_faker(seed, 'notifications', start)
+    return [
+        (user, faker.sentence(), rng.random() < 0.5)
+        for user in range(start, start + count)
+        for _ in range(rng.randint(1, 4))
+    ]
+
+
+class Seeder:
+    """Generate users, lessons, invoices and notifications and write them in one transaction.
+
+    Rows are built in memory and written with bulk_create, so seeding does
+    not run a query per row. With more than one worker the rows are
+    generated in a process pool and this process is the only writer.
+    """
+
+    def __init__(self, users=500, lessons=None, seed=None, batch_size=BATCH_SIZE, workers=1, log=None):
+        self.user_count = users
+        self.lesson_count = lessons
+        self.batch_size = batch_size
+        self.workers = workers
+        self.log = log or (lambda message: None)
+        self.seed_value = seed if seed is not None else Random().getrandbits(64)
+        self.password = make_password(DEFAULT_PASSWORD)
+        self.now = timezone.now()
+        self.pool = None
+
+    def seed(self):
+        """Seed the database and return the number of rows created per model."""
+        if self.workers > 1:
+            self.pool = multiprocessing.Pool(self.workers, initializer=django.setup)
+        try:
+            with transaction.atomic():
+                self.subjects = self.create_subjects()
+                users = self.create_users()
+                lessons, invoices = self.create_lessons(users)
+                notifications = self.create_notifications(users)
+        finally:
+            if self.pool is not None:
+                self.pool.terminate()
+                self.pool.join()
+                self.pool = None
+        invalidate_dashboard_stats()
+        invalidate_availability(User.objects.filter(type='tutor').values_list('pk', flat=True))
+        invalidate_unread_counts(pk for pk, _, _ in users)
+        invalidate_filter_options(User, Subject, Lesson, Invoice, Notification)
+        invalidate_autocomplete(User, Subject, Lesson)
+        return {'users': len(users), 'lessons': lessons, 'invoices': invoices, 'notifications': notifications}
+
+    def generate(self, function, tasks):
+        """Yield the result of each chunk generator call, in order."""
+        if self.pool is None:
+            return (function(*args) for args in tasks)
+        return self.pool.imap(run_task, ((function, args) for args in tasks))
+
+    def insert_prepared(self, model, fields, rows):
+        """Insert rows of values already prepared for the database.
+
+        This skips the per value preparation of bulk_create, which dominates
+        the writer for the occurrence table.
+        """
+        columns = ', '.join(connection.ops.quote_name(model._meta.get_field(name).column) for name in fields)
+        placeholders = ', '.join(['%s'] * len(fields))
+        sql = f"INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})"
+        with connection.cursor() as cursor:
+            for batch in batched(rows, self.batch_size):
+                cursor.executemany(sql, batch)
+
+    # Subject seeding
+    def create_subjects(self):
+        existing = set(Subject.objects.values_list('name', flat=True))
+        Subject.objects.bulk_create([Subject(name=name) for name, _ in Subject.SUBJECT_CHOICES if name not in existing])
+        return list(Subject.objects.order_by('pk'))
+
+    # User seeding
+    def create_users(self):
+        """Create the fixture users and random users until the user count is reached.
+
+        Returns (pk, username, type) for every created user.
+        """
+        existing = set(User.objects.values_list('username', flat=True))
+        fixtures = [data for data in USER_FIXTURES if data['username'] not in existing]
+        subjects = {subject.name: index for index, subject in enumerate(self.subjects)}
+        users = self.insert_users([
+            (data['username'], data['email'], data['first_name'], data['last_name'], data['type'], [subjects[name] for name in data.get('subjects', [])])
+            for data in fixtures
+        ])
+        offset = (User.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        missing = max(self.user_count - len(existing) - len(fixtures), 0)
+        tasks = ((self.seed_value, start, count, offset, len(self.subjects)) for start, count in chunks(missing, self.batch_size))
+        for rows in self.generate(generate_users, tasks):
+            users.extend(self.insert_users(rows))
+        self.log(f"Seeded {len(users)} users.")
+        return users
+
+    def insert_users(self, rows):
+        """Write user rows and their tutor subjects, returning (pk, username, type) per user."""
+        users = [
+            User(
+                username=username,
+                email=email,
+                password=self.password,
+                first_name=first_name,
+                last_name=last_name,
+                type=type,
+                is_staff=type == 'admin',
+                is_superuser=type == 'admin',
+            )
+            for username, email, first_name, last_name, type, _ in rows
+        ]
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        User.subjects.through.objects.bulk_create([
+            User.subjects.through(user_id=user.pk, subject_id=self.subjects[subject].pk)
+            for user, row in zip(users, rows)
+            for subject in row[5]
+        ], batch_size=self.batch_size)
+        return [(user.pk, user.username, user.type) for user in users]
+
+    # Lesson and invoice seeding
+    def create_lessons(self, users):
+        """Create the fixture lessons and invoices and random lessons for the new students.
+
+        Every approved random lesson gets an invoice. Returns the number of
+        lessons and invoices created.
+        """
+        lessons, invoices = self.create_fixture_lessons(users)
+        students = [pk for pk, _, type in users if type == 'student']
+        tutors = list(User.objects.filter(type='tutor').order_by('pk').values_list('pk', flat=True))
+        if students and tutors:
+            per_student = self.lesson_count is None
+            total = len(students) if per_student else self.lesson_count
+            size = max(self.batch_size // 6, 1) if per_student else self.batch_size
+            tasks = (
+                (self.seed_value, start, count, per_student, len(students), len(tutors), len(self.subjects), self.now)
+                for start, count in chunks(total, size)
+            )
+            for rows in self.generate(generate_lessons, tasks):
+                created, invoiced = self.insert_lessons(rows, students, tutors)
+                lessons += created
+                invoices += invoiced
+        self.log(f"Seeded {lessons} lessons.")
+        self.log(f"Seeded {invoices} invoices.")
+        return lessons, invoices
+
+    def insert_lessons(self, rows, students, tutors):
+        """Write lesson rows with their occurrences and invoices."""
+        lessons = [
+            Lesson(
+                student_id=students[student],
+                subject_id=self.subjects[subject].pk,
+                tutor_id=tutors[tutor],
+                date=date,
+                duration=duration,
+                status=status,
+                recurrence=recurrence,
+                recurrence_end_date=recurrence_end_date,
+            )
+            for student, subject, tutor, date, duration, status, recurrence, recurrence_end_date, _, _ in rows
+        ]
+        Lesson.objects.bulk_create(lessons, batch_size=self.batch_size)
+        self.insert_prepared(LessonOccurrence, ['lesson', 'start', 'end'], [
+            (lesson.pk, start, end)
+            for lesson, row in zip(lessons, rows)
+            for start, end in row[8]
+        ])
+        invoices = [
+            Invoice(student_id=lesson.student_id, lesson_id=lesson.pk, amount=row[9][0], due_date=row[9][1], paid=row[9][2])
+            for lesson, row in zip(lessons, rows)
+            if row[9] is not None
+        ]
+        Invoice.objects.bulk_create(invoices, batch_size=self.batch_size)
+        return len(lessons), len(invoices)
+
+    def create_fixture_lessons(self, users):
+        users = {username: pk for pk, username, _ in users}
+        if '@charlie' not in users or '@janedoe' not in users:
+            return 0, 0
+        subjects = {subject.name: subject for subject in self.subjects}
+        student, tutor = users['@charlie'], users['@janedoe']
+        lessons = [
+            Lesson(student_id=student, subject=subjects['Python'], tutor_id=tutor, date=datetime(2024, 8, 12, 10, 0, tzinfo=pytz.utc), duration=45, status='Approved'),
+            Lesson(student_id=student, subject=subjects['Java'], tutor_id=tutor, date=self.now + timedelta(days=1), duration=60, status='Pending'),
+            Lesson(student_id=student, subject=subjects['C++'], tutor_id=tutor, date=self.now + timedelta(days=1, hours=2), duration=120, status='Approved', recurrence='Weekly', recurrence_end_date=(self.now + timedelta(days=50)).date()),
+        ]
+        Lesson.objects.bulk_create(lessons)
+        LessonOccurrence.rebuild(lessons)
+        invoices = [
+            Invoice(student_id=student, amount=22.5, due_date=datetime(2024, 8, 22).date(), paid=False),
+            Invoice(student_id=student, amount=30, due_date=(self.now + timedelta(days=4)).date(), paid=True),
+            Invoice(student_id=student, amount=60, due_date=(self.now + timedelta(days=11, hours=2)).date(), paid=False),
+        ]
+        rng = chunk_random(self.seed_value, 'fixtures', 0)
+        invoices.extend(
+            Invoice(student_id=student, lesson=lesson, amount=calculate_invoice_amount(lesson), due_date=(lesson.date + timedelta(days=rng.randint(-10, 20))).date(), paid=rng.random() < 0.5)
+            for lesson in lessons
+            if lesson.status == 'Approved'
+        )
+        Invoice.objects.bulk_create(invoices)
+        return len(lessons), len(invoices)
+
+    # Notification seeding
+    def create_notifications(self, users):
+        """Create the fixture notifications and a few random notifications per new user."""
+        notifications = self.create_fixture_notifications(users)
+        tasks = ((self.seed_value, start, count) for start, count in chunks(len(users), self.batch_size))
+        for rows in self.generate(generate_notifications, tasks):
+            created = [Notification(user_id=users[user][0], message=message, is_read=is_read) for user, message, is_read in rows]
+            Notification.objects.bulk_create(created, batch_size=self.batch_size)
+            notifications += len(created)
+        self.log(f"Seeded {notifications} notifications.")
+        return notifications
+
+    def create_fixture_notifications(self, users):
+        users = {username: pk for pk, username, _ in users}
+        if '@charlie' not in users or '@janedoe' not in users:
+            return 0
+        notifications = [
+            Notification(user_id=users['@charlie'], message='You have a new lesson with Jane Doe on Python scheduled for tomorrow.'),
+            Notification(user_id=users['@charlie'], message='Your invoice for lesson with Jane Doe on Python is due in 3 days.', is_read=True),
+            Notification(user_id=users['@janedoe'], message='Your invoice for lesson with Jane Doe on Python is overdue.'),
+        ]
+        Notification.objects.bulk_create(notifications)
+        return len(notifications)
@@ -0,0 +1,107 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from tutorials.autocomplete import LOOKUPS, invalidate_autocomplete
+from tutorials.models import User, Subject, Lesson, Invoice, Notification
+from tutorials.notifications import invalidate_unread_counts_on_commit
+from tutorials.options import FILTER_OPTION_SOURCES, invalidate_filter_options
+from tutorials.scheduling import invalidate_availability
+from tutorials.stats import COUNTED_FIELDS, invalidate_dashboard_stats
+
+# Fields that change when and how often a lesson takes place
+SCHEDULE_FIELDS = {'date', 'duration', 'recurrence', 'recurrence_end_date'}
+# Fields that change which tutor a lesson books and when
+AVAILABILITY_FIELDS = SCHEDULE_FIELDS | {'tutor', 'status'}
+# Fields whose changes alter the unread notification counts
+UNREAD_FIELDS = {'user', 'is_read'}
+
+@receiver(post_save, sender=Lesson)
+def sync_lesson_occurrences(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored occurrences of a lesson in line with its schedule."""
+    if update_fields is not None and not SCHEDULE_FIELDS.intersection(update_fields):
+        return
+    instance.sync_occurrences()
+
+@receiver(pre_save, sender=Lesson)
+def remember_previous_tutor(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Remember which tutor a lesson belonged to before it is saved.
+
+    The tutor loaded with the lesson is used when there is one, so only lessons
+    built by hand are read back from the database.
+    """
+    if raw or instance.pk is None or (update_fields is not None and 'tutor' not in update_fields):
+        instance._previous_tutor_id = None
+    elif hasattr(instance, '_loaded_tutor_id'):
+        instance._previous_tutor_id = instance._loaded_tutor_id
+    else:
+        instance._previous_tutor_id = Lesson.objects.filter(pk=instance.pk).values_list('tutor_id', flat=True).first()
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_tutor_availability(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached availability of the tutors affected by a lesson change."""
+    if update_fields is not None and not AVAILABILITY_FIELDS.intersection(update_fields):
+        return
+    invalidate_availability({instance.tutor_id, getattr(instance, '_previous_tutor_id', None)})
+    instance._loaded_tutor_id = instance.tutor_id
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=Notification)
+def refresh_dashboard_stats(sender, update_fields=None, **kwargs):
+    """Drop the cached dashboard statistics when a counted row changes."""
+    if update_fields is not None and not COUNTED_FIELDS[sender].intersection(update_fields):
+        return
+    invalidate_dashboard_stats()
+
+@receiver(pre_save, sender=Notification)
+def remember_previous_user(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Remember which user a notification belonged to before it is saved."""
+    if raw or instance.pk is None or (update_fields is not None and 'user' not in update_fields):
+        instance._previous_user_id = None
+    else:
+        instance._previous_user_id = Notification.objects.filter(pk=instance.pk).values_list('user_id', flat=True).first()
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def refresh_unread_count(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached unread notification count of the notification's user once the change is committed."""
+    if update_fields is not None and not UNREAD_FIELDS.intersection(update_fields):
+        return
+    invalidate_unread_counts_on_commit([instance.user_id, getattr(instance, '_previous_user_id', None)])
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Subject)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=Notification)
+def refresh_filter_options(sender, update_fields=None, **kwargs):
+    """Move the admin lists whose dropdown options depend on a changed row to new options."""
+    if update_fields is not None:
+        fields = set().union(*(sources.get(sender, ()) for sources in FILTER_OPTION_SOURCES.values()))
+        if not fields.intersection(update_fields):
+            return
+    invalidate_filter_options(sender)
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Subject)
+@receiver(post_delete, sender=Lesson)
+def refresh_autocomplete(sender, update_fields=None, **kwargs):
+    """Move the autocomplete lookups whose options depend on a changed row to new options."""
+    if update_fields is not None:
+        fields = set().union(*(lookup.sources.get(sender, ()) for lookup in LOOKUPS.values()))
+        if not fields.intersection(update_fields):
+            return
+    invalidate_autocomplete(sender)
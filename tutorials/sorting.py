@@ -0,0 +1,62 @@
+"""Whitelisted sort keys of the admin list views."""
+
+
+class Sort:
+    """The public sort keys of a list view and the columns each of them orders by.
+
+    Keys are looked up in a dict, so an unknown or malformed order_by falls
+    back to the default without reaching the database. Related rows are
+    ordered by an explicit column, never by the related model's
+    Meta.ordering. Keys ordering by a single indexed column are listed in
+    keyset and paginated with cursors.
+    """
+
+    def __init__(self, default, keys, keyset=()):
+        self.default = default
+        self.keys = keys
+        self.keyset = set(keyset)
+
+    def key(self, order_by):
+        """Return order_by if it is a known key, optionally prefixed with '-', or else the default."""
+        return order_by if order_by and order_by.removeprefix('-') in self.keys else self.default
+
+    def columns(self, key):
+        """Return the order_by expressions of a key; paginate adds the primary key tiebreaker."""
+        prefix = '-' if key.startswith('-') else ''
+        return [prefix + column for column in self.keys[key.removeprefix('-')]]
+
+
+SORTS = {
+    'users': Sort('username', {
+        'username': ['username'],
+        'email': ['email'],
+        'first_name': ['first_name', 'last_name'],
+        'last_name': ['last_name', 'first_name'],
+        'type': ['type', 'username'],
+    }, keyset=['username']),
+    'lessons': Sort('date', {
+        'date': ['date'],
+        'student': ['student__username', 'date'],
+        'tutor': ['tutor__username', 'date'],
+        'subject': ['subject__name', 'date'],
+        'subject__name': ['subject__name', 'date'],
+        'duration': ['duration', 'date'],
+        'status': ['status', 'date'],
+        'recurrence': ['recurrence', 'date'],
+        'end_date': ['recurrence_end_date', 'date'],
+    }, keyset=['date']),
+    'invoices': Sort('due_date', {
+        'id': ['id'],
+        'amount': ['amount'],
+        'due_date': ['due_date'],
+        'paid': ['paid', 'due_date'],
+        'student__username': ['student__username', 'due_date'],
+        'lesson__date': ['lesson__date'],
+    }, keyset=['due_date', 'id']),
+    'notifications': Sort('created_at', {
+        'created_at': ['created_at'],
+        'is_read': ['is_read', 'created_at'],
+        'message': ['message'],
+        'user__username': ['user__username', 'created_at'],
+    }, keyset=['created_at']),
+}
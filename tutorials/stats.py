@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+from tutorials.models import User, Lesson, Invoice, Notification
+
+DASHBOARD_STATS_CACHE_KEY = 'admin_dashboard_stats'
+# How long the dashboard statistics are kept in the cache, in seconds
+DASHBOARD_STATS_TIMEOUT = 60
+
+# Fields whose changes alter the dashboard statistics of each model
+COUNTED_FIELDS = {
+    User: {'type'},
+    Lesson: {'date', 'status'},
+    Invoice: {'paid'},
+    Notification: {'is_read'},
+}
+
+def count(**filters):
+    """Return a conditional count of the rows matching the filters."""
+    return Count('pk', filter=Q(**filters)) if filters else Count('pk')
+
+def compute_dashboard_stats(now=None):
+    """Compute the admin dashboard statistics with one aggregate query per table."""
+    now = now or timezone.now()
+    stats = {}
+    stats.update(User.objects.aggregate(
+        total_users=count(),
+        student_users=count(type='student'),
+        tutor_users=count(type='tutor'),
+        admin_users=count(type='admin'),
+    ))
+    stats.update(Lesson.objects.filter(date__gte=now).aggregate(
+        total_lessons=count(),
+        approved_lessons=count(status='Approved'),
+        pending_lessons=count(status='Pending'),
+        rejected_lessons=count(status='Rejected'),
+    ))
+    stats.update(Invoice.objects.aggregate(
+        total_invoices=count(),
+        paid_invoices=count(paid=True),
+        unpaid_invoices=count(paid=False),
+    ))
+    stats.update(Notification.objects.aggregate(
+        total_notifications=count(),
+        read_notifications=count(is_read=True),
+        unread_notifications=count(is_read=False),
+    ))
+    return stats
+
+def dashboard_stats():
+    """Return the admin dashboard statistics, computing them when the cache is cold."""
+    stats = cache.get(DASHBOARD_STATS_CACHE_KEY)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(DASHBOARD_STATS_CACHE_KEY, stats, DASHBOARD_STATS_TIMEOUT)
+    return stats
+
+def invalidate_dashboard_stats():
+    """Drop the cached admin dashboard statistics."""
+    cache.delete(DASHBOARD_STATS_CACHE_KEY)
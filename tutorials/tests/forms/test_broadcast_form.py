@@ -0,0 +1,57 @@
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from tutorials.forms import BroadcastForm
+from tutorials.models import User, Subject, Lesson, Invoice
+
+class BroadcastFormTestCase(TestCase):
+    """Unit tests for the BroadcastForm."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.student = User.objects.get(pk=1)
+        self.tutor = User.objects.get(pk=2)
+        self.date = timezone.now() + timedelta(days=3)
+
+    def recipients(self, **data):
+        form = BroadcastForm(data={'message': 'The centre is closed on Monday.', **data})
+        self.assertTrue(form.is_valid(), form.errors)
+        return set(form.recipients().values_list('username', flat=True))
+
+    def test_form_rejects_empty_message(self):
+        form = BroadcastForm(data={'message': ''})
+        self.assertFalse(form.is_valid())
+
+    def test_form_rejects_reversed_lesson_range(self):
+        form = BroadcastForm(data={'message': 'Hello', 'lessons_from': '2025-02-01', 'lessons_to': '2025-01-01'})
+        self.assertFalse(form.is_valid())
+
+    def test_without_filters_every_user_is_a_recipient(self):
+        self.assertEqual(len(self.recipients()), User.objects.count())
+
+    def test_filter_by_type(self):
+        self.assertEqual(self.recipients(type='student'), set(User.objects.filter(type='student').values_list('username', flat=True)))
+
+    def test_filter_by_subject_taught(self):
+        subject = Subject.objects.get(pk=1)
+        self.assertEqual(self.recipients(subject=subject.pk), {'@janedoe'})
+
+    def test_filter_by_lessons_in_range(self):
+        Lesson.objects.create(student=self.student, subject=Subject.objects.get(pk=1), tutor=self.tutor, date=self.date, duration=60, status='Approved')
+        Lesson.objects.create(student=User.objects.get(pk=4), subject=Subject.objects.get(pk=1), date=self.date, duration=60, status='Rejected')
+        day = self.date.date().isoformat()
+        self.assertEqual(self.recipients(lessons_from=day, lessons_to=day), {'@charlie', '@janedoe'})
+        self.assertEqual(self.recipients(lessons_from=(self.date.date() + timedelta(days=1)).isoformat()), set())
+
+    def test_lesson_range_covers_whole_days(self):
+        day = (timezone.now() + timedelta(days=3)).replace(hour=23, minute=30, second=0, microsecond=0)
+        Lesson.objects.create(student=self.student, subject=Subject.objects.get(pk=1), date=day, duration=60, status='Approved')
+        self.assertEqual(self.recipients(lessons_from=day.date().isoformat(), lessons_to=day.date().isoformat()), {'@charlie'})
+        self.assertEqual(self.recipients(lessons_to=(day.date() - timedelta(days=1)).isoformat()), set())
+        self.assertEqual(self.recipients(lessons_from=(day.date() + timedelta(days=1)).isoformat()), set())
+
+    def test_filter_by_overdue_invoices(self):
+        Invoice.objects.create(student=self.student, amount=10, due_date=timezone.now().date() - timedelta(days=1))
+        Invoice.objects.create(student=User.objects.get(pk=4), amount=10, due_date=timezone.now().date() - timedelta(days=1), paid=True)
+        self.assertEqual(self.recipients(has_overdue_invoices='on'), {'@charlie'})
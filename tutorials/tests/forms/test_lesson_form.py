@@ -100,4 +100,46 @@ class LessonFormTestCase(TestCase):
         )
         form = LessonForm(data=self.form_input)
         self.assertFalse(form.is_valid())
-        self.assertIn('date', form.errors)
\ No newline at end of file
+        self.assertIn('date', form.errors)
+
+    def test_form_rejects_overlap_with_recurring_lesson(self):
+        start = timezone.now() - timedelta(days=6)
+        Lesson.objects.create(
+            student=self.student,
+            subject=self.subject,
+            date=start,
+            duration=60,
+            status='Approved',
+            recurrence='Weekly',
+            recurrence_end_date=start.date() + timedelta(weeks=4),
+        )
+        self.form_input['date'] = start + timedelta(weeks=1, minutes=30)
+        form = LessonForm(data=self.form_input)
+        self.assertFalse(form.is_valid())
+        self.assertIn('date', form.errors)
+
+    def test_form_ignores_rejected_lessons(self):
+        Lesson.objects.create(
+            student=self.student,
+            tutor=self.tutor,
+            subject=self.subject,
+            date=self.form_input['date'],
+            duration=60,
+            status='Rejected',
+        )
+        form = LessonForm(data=self.form_input)
+        self.assertTrue(form.is_valid())
+
+    def test_form_rejects_tutor_overlap(self):
+        other_student = User.objects.get(username='@student')
+        Lesson.objects.create(
+            student=other_student,
+            tutor=self.tutor,
+            subject=self.subject,
+            date=self.form_input['date'] + timedelta(minutes=15),
+            duration=60,
+            status='Approved',
+        )
+        form = LessonForm(data=self.form_input)
+        self.assertFalse(form.is_valid())
+        self.assertIn('tutor', form.errors)
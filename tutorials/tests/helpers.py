@@ -1,7 +1,14 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from with_asserts.mixin import AssertHTMLMixin
 from tutorials.models import User, Lesson, Subject, Invoice, Notification
 
+# Cache of the tests that count the queries of cached code paths, to which the
+# database cache of the settings would add its own queries
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
 def reverse_with_next(url_name, next_url):
     """Extended version of reverse to generate URLs with redirects"""
     url = reverse(url_name)
@@ -34,4 +41,26 @@ class MenuTesterMixin(AssertHTMLMixin):
         """Check that no menu is present."""
         
         for url in self.menu_urls:
-            self.assertNotHTML(response, f'a[href="{url}"]')
\ No newline at end of file
+            self.assertNotHTML(response, f'a[href="{url}"]')
+
+class QueryBudgetMixin:
+    """Class to extend tests with tools to check that a page runs a bounded number of queries."""
+
+    def count_queries(self, url, data=None):
+        """Return the number of queries run while rendering the given url."""
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, data or {})
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assert_constant_queries(self, url, add_rows, data=None, maximum=None):
+        """Check that adding rows through add_rows does not change the query count of a page."""
+
+        before = self.count_queries(url, data)
+        add_rows()
+        after = self.count_queries(url, data)
+        self.assertEqual(before, after, f"{url} ran {before} queries before adding rows and {after} after")
+        if maximum is not None:
+            self.assertLessEqual(after, maximum, f"{url} ran {after} queries, the budget is {maximum}")
@@ -0,0 +1,81 @@
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from tutorials.billing import uninvoiced_lessons, invoice_approved_lessons
+from tutorials.models import User, Lesson, Invoice, Subject
+from tutorials.tests.helpers import LOCAL_CACHES
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class BatchInvoicingTest(TestCase):
+    """Tests for the batch invoicing of approved lessons."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.student = User.objects.get(pk=1)
+        self.tutor = User.objects.get(pk=2)
+        self.subject = Subject.objects.get(pk=1)
+        self.date = timezone.now() + timedelta(days=1)
+
+    def create_lesson(self, **kwargs):
+        data = {
+            'student': self.student,
+            'subject': self.subject,
+            'tutor': self.tutor,
+            'date': self.date,
+            'duration': 60,
+            'status': 'Approved',
+        }
+        data.update(kwargs)
+        return Lesson.objects.create(**data)
+
+    def test_only_approved_uninvoiced_lessons_are_selected(self):
+        approved = self.create_lesson()
+        invoiced = self.create_lesson()
+        Invoice.objects.create(student=self.student, lesson=invoiced, amount=30, due_date=self.date.date())
+        self.create_lesson(status='Pending')
+        self.create_lesson(status='Rejected')
+        self.assertEqual(list(uninvoiced_lessons()), [approved])
+
+    def test_invoices_are_created_for_each_lesson(self):
+        lesson = self.create_lesson(duration=90)
+        count, total = invoice_approved_lessons()
+        self.assertEqual(count, 1)
+        self.assertEqual(total, Decimal('45.00'))
+        invoice = Invoice.objects.get(lesson=lesson)
+        self.assertEqual(invoice.student, self.student)
+        self.assertEqual(invoice.amount, Decimal('45.00'))
+        self.assertEqual(invoice.due_date, lesson.date.date())
+        self.assertFalse(invoice.paid)
+
+    def test_invoicing_is_idempotent(self):
+        self.create_lesson()
+        self.create_lesson()
+        self.assertEqual(invoice_approved_lessons()[0], 2)
+        self.assertEqual(invoice_approved_lessons(), (0, Decimal('0.00')))
+        self.assertEqual(Invoice.objects.count(), 2)
+
+    def test_dry_run_does_not_create_invoices(self):
+        self.create_lesson()
+        self.assertEqual(invoice_approved_lessons(commit=False)[0], 1)
+        self.assertFalse(Invoice.objects.exists())
+
+    def test_query_count_does_not_grow_with_lessons(self):
+        for _ in range(5):
+            self.create_lesson()
+        with CaptureQueriesContext(connection) as context:
+            invoice_approved_lessons(batch_size=100)
+        self.assertLessEqual(len(context.captured_queries), 4)
+
+    def test_command_reports_counts(self):
+        self.create_lesson()
+        out = StringIO()
+        call_command('generate_invoices', stdout=out)
+        self.assertIn('Created 1 invoices', out.getvalue())
+        self.assertEqual(Invoice.objects.count(), 1)
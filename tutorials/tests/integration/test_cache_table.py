@@ -0,0 +1,20 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from tutorials.apps import create_cache_table
+
+DATABASE_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'orca_cache'}}
+
+
+@override_settings(CACHES=DATABASE_CACHES)
+class CacheTableTest(TestCase):
+    """Tests that migrating sets up the database cache."""
+
+    def test_post_migrate_creates_missing_cache_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE orca_cache')
+        self.assertNotIn('orca_cache', connection.introspection.table_names())
+        create_cache_table(using='default')
+        self.assertIn('orca_cache', connection.introspection.table_names())
+        cache.set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
@@ -0,0 +1,56 @@
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from tutorials.models import User, Lesson, Invoice, Notification
+from tutorials.stats import compute_dashboard_stats, dashboard_stats
+from tutorials.tests.helpers import LOCAL_CACHES
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class DashboardStatsTestCase(TestCase):
+    """Tests for the admin dashboard statistics."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json', 'tutorials/tests/fixtures/lessons.json', 'tutorials/tests/fixtures/invoices.json', 'tutorials/tests/fixtures/notifications.json']
+
+    def setUp(self):
+        cache.clear()
+
+    def test_stats_match_individual_counts(self):
+        """Test that the aggregated statistics match one count per filter."""
+        now = timezone.now()
+        stats = compute_dashboard_stats(now)
+        self.assertEqual(stats['total_users'], User.objects.count())
+        self.assertEqual(stats['tutor_users'], User.objects.filter(type='tutor').count())
+        self.assertEqual(stats['total_lessons'], Lesson.objects.filter(date__gte=now).count())
+        self.assertEqual(stats['pending_lessons'], Lesson.objects.filter(status='Pending', date__gte=now).count())
+        self.assertEqual(stats['unpaid_invoices'], Invoice.objects.filter(paid=False).count())
+        self.assertEqual(stats['read_notifications'], Notification.objects.filter(is_read=True).count())
+
+    def test_stats_use_one_query_per_table(self):
+        """Test that computing the statistics costs four queries."""
+        with self.assertNumQueries(4):
+            compute_dashboard_stats()
+
+    def test_stats_are_cached_and_invalidated(self):
+        """Test that the statistics are cached until a counted row changes."""
+        total = dashboard_stats()['total_notifications']
+        with self.assertNumQueries(0):
+            dashboard_stats()
+        Notification.objects.create(user=User.objects.get(pk=1), message='Hello')
+        self.assertEqual(dashboard_stats()['total_notifications'], total + 1)
+
+    def test_stats_ignore_unrelated_updates(self):
+        """Test that saving fields the dashboard does not count keeps the cache."""
+        dashboard_stats()
+        user = User.objects.get(pk=1)
+        user.last_login = timezone.now()
+        user.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            dashboard_stats()
+
+    def test_dashboard_view_uses_cached_stats(self):
+        """Test that the dashboard view serves the cached statistics."""
+        self.client.login(username='@johndoe', password='Password123')
+        response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.context['total_lessons'], Lesson.objects.filter(date__gte=timezone.now()).count())
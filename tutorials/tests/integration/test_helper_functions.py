@@ -2,7 +2,7 @@ from django.test import TestCase
 from django.http import HttpRequest
 from django.contrib.auth.models import AnonymousUser
 from tutorials.models import User, Lesson, Subject
-from tutorials.helpers import calculate_lesson_dates, days_between, calculate_invoice_amount, model_is_valid, login_prohibited
+from tutorials.helpers import calculate_lesson_dates, occurrence_count, next_occurrence, occurrences_between, build_month_calendar, month_range, days_between, calculate_invoice_amount, model_is_valid, login_prohibited
 from datetime import datetime, timedelta, date
 from django.utils import timezone
 import pytz
@@ -64,6 +64,59 @@ class HelperFunctionsTestCase(TestCase):
         dates = calculate_lesson_dates(start_date, end_date, recurrence)
         self.assertEqual(dates, [])
 
+    def test_occurrence_count(self):
+        """Test occurrence_count agrees with calculate_lesson_dates."""
+        start_date = datetime(2024, 1, 1, 10, 0, tzinfo=pytz.UTC)
+        for recurrence, end_date in [('None', None), ('Daily', date(2024, 1, 3)), ('Weekly', date(2024, 3, 1)), ('Monthly', date(2025, 1, 1))]:
+            self.assertEqual(occurrence_count(start_date, end_date, recurrence), len(calculate_lesson_dates(start_date, end_date, recurrence)))
+        self.assertEqual(occurrence_count(start_date, date(2023, 12, 31), 'Daily'), 0)
+
+    def test_next_occurrence(self):
+        """Test next_occurrence jumps straight to the first occurrence after an instant."""
+        start_date = datetime(2024, 1, 1, 10, 0, tzinfo=pytz.UTC)
+        end_date = date(2030, 1, 1)
+        self.assertEqual(next_occurrence(start_date, end_date, 'Weekly', datetime(2024, 1, 9, tzinfo=pytz.UTC)), datetime(2024, 1, 15, 10, 0, tzinfo=pytz.UTC))
+        self.assertEqual(next_occurrence(start_date, end_date, 'Weekly', start_date), start_date)
+        self.assertEqual(next_occurrence(start_date, end_date, 'Weekly', start_date, strict=True), datetime(2024, 1, 8, 10, 0, tzinfo=pytz.UTC))
+        self.assertIsNone(next_occurrence(start_date, end_date, 'Daily', datetime(2030, 1, 1, 11, 0, tzinfo=pytz.UTC)))
+        self.assertIsNone(next_occurrence(start_date, None, 'None', datetime(2024, 1, 2, tzinfo=pytz.UTC)))
+
+    def test_occurrences_between(self):
+        """Test occurrences_between only returns occurrences inside the window."""
+        start_date = datetime(2024, 1, 1, 10, 0, tzinfo=pytz.UTC)
+        dates = occurrences_between(start_date, date(2030, 1, 1), 'Daily', datetime(2029, 3, 1, tzinfo=pytz.UTC), datetime(2029, 3, 4, tzinfo=pytz.UTC))
+        self.assertEqual(dates, [
+            datetime(2029, 3, 1, 10, 0, tzinfo=pytz.UTC),
+            datetime(2029, 3, 2, 10, 0, tzinfo=pytz.UTC),
+            datetime(2029, 3, 3, 10, 0, tzinfo=pytz.UTC),
+        ])
+        self.assertEqual(occurrences_between(start_date, None, 'None', start_date, start_date + timedelta(hours=1)), [start_date])
+        self.assertEqual(occurrences_between(start_date, None, 'None', start_date + timedelta(hours=1)), [])
+
+    def test_month_range(self):
+        """Test month_range across a year boundary."""
+        start, end = month_range(2024, 12)
+        self.assertEqual(start, datetime(2024, 12, 1, tzinfo=pytz.UTC))
+        self.assertEqual(end, datetime(2025, 1, 1, tzinfo=pytz.UTC))
+
+    def test_build_month_calendar(self):
+        """Test build_month_calendar buckets occurrences by day."""
+        lesson = Lesson.objects.get(pk=1)
+        occurrences = [
+            (datetime(2024, 1, 2, 10, 0, tzinfo=pytz.UTC), lesson),
+            (datetime(2024, 1, 2, 10, 0, tzinfo=pytz.UTC), lesson),
+            (datetime(2024, 1, 9, 10, 0, tzinfo=pytz.UTC), lesson),
+            (datetime(2024, 2, 1, 10, 0, tzinfo=pytz.UTC), lesson),
+        ]
+        calendar = build_month_calendar(2024, 1, occurrences)
+        days = [day for week in calendar for day in week if day]
+        self.assertEqual(len(days), 31)
+        self.assertTrue(all(len(week) == 7 for week in calendar))
+        self.assertEqual(calendar[0][0], {'day': 1, 'lessons': []})
+        self.assertEqual(days[1]['lessons'], [lesson])
+        self.assertEqual(days[8]['lessons'], [lesson])
+        self.assertEqual(sum(len(day['lessons']) for day in days), 2)
+
     def test_days_between(self):
         """Test days_between function."""
         start_date = date(2024, 1, 1)
@@ -94,7 +147,7 @@ class HelperFunctionsTestCase(TestCase):
             recurrence_end_date=date(2024, 1, 4),
         )
         amount = calculate_invoice_amount(lesson)
-        self.assertEqual(amount, 90.0)  # 60 * 0.5 * 3 days
+        self.assertEqual(amount, 120.0)  # 60 * 0.5 * 4 days
 
     def test_calculate_invoice_amount_weekly_recurrence(self):
         """Test calculate_invoice_amount with daily recurrence."""
@@ -107,7 +160,7 @@ class HelperFunctionsTestCase(TestCase):
             recurrence_end_date=date(2024, 1, 18),
         )
         amount = calculate_invoice_amount(lesson)
-        self.assertEqual(amount, 60)  # 60 * 0.5 * 2 weeks
+        self.assertEqual(amount, 90)  # 60 * 0.5 * 3 weeks
 
     def test_calculate_invoice_amount_monthly_recurrence(self):
         """Test calculate_invoice_amount with daily recurrence."""
@@ -120,7 +173,7 @@ class HelperFunctionsTestCase(TestCase):
             recurrence_end_date=date(2024, 3, 2),
         )
         amount = calculate_invoice_amount(lesson)
-        self.assertEqual(amount, 60)  # 60 * 0.5 * 2 months
+        self.assertEqual(amount, 90)  # 60 * 0.5 * 3 occurrences, 30 days apart
 
     def test_model_is_valid_valid_model(self):
         """Test model_is_valid with a valid model."""
@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from datetime import date, timedelta
+from io import StringIO
+from tutorials.models import User, Invoice, Notification
+from tutorials.notifications import invoice_message, send_invoice_reminders, unread_count
+from tutorials.tests.helpers import LOCAL_CACHES
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class InvoiceReminderTest(TestCase):
+    """Tests for the overdue and soon due invoice reminders."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.get(pk=1)
+        self.today = date(2025, 3, 10)
+
+    def create_invoice(self, days, paid=False, student=None):
+        return Invoice.objects.create(student=student or self.student, amount=45, due_date=self.today + timedelta(days=days), paid=paid)
+
+    def test_invoice_messages(self):
+        """Test that the reminder texts match the ones sent from the admin."""
+        overdue = self.create_invoice(-1)
+        due_soon = self.create_invoice(2)
+        paid = self.create_invoice(-1, paid=True)
+        overdue.refresh_from_db()
+        self.assertEqual(invoice_message(overdue, self.today), f"You have failed to pay your invoice {overdue.pk} for 45.00 before 09/03/2025 and it is now overdue, which may affect your ability to book lessons")
+        self.assertEqual(invoice_message(due_soon, self.today), f"Reminder: Please pay your invoice {due_soon.pk} for 45 before 12/03/2025")
+        self.assertEqual(invoice_message(paid, self.today), f"Your invoice {paid.pk} for 45 has been paid")
+
+    def test_reminders_are_sent_for_overdue_and_soon_due_invoices(self):
+        """Test that only unpaid invoices that are overdue or due soon get a reminder."""
+        overdue = self.create_invoice(-5)
+        due_soon = self.create_invoice(3)
+        self.create_invoice(4)
+        self.create_invoice(-5, paid=True)
+        self.assertEqual(send_invoice_reminders(days=3, today=self.today), (1, 1, 0))
+        messages = set(Notification.objects.filter(user=self.student).values_list('message', flat=True))
+        overdue.refresh_from_db()
+        due_soon.refresh_from_db()
+        self.assertEqual(messages, {invoice_message(overdue, self.today), invoice_message(due_soon, self.today)})
+
+    def test_reminders_are_not_sent_twice(self):
+        """Test that a second run skips reminders that were already sent."""
+        self.create_invoice(-5)
+        self.create_invoice(1, student=User.objects.get(pk=4))
+        send_invoice_reminders(today=self.today)
+        self.assertEqual(send_invoice_reminders(today=self.today), (0, 0, 2))
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_overdue_reminder_follows_due_soon_reminder(self):
+        """Test that a due soon invoice still gets its overdue reminder later."""
+        self.create_invoice(1)
+        send_invoice_reminders(today=self.today)
+        self.assertEqual(send_invoice_reminders(today=self.today + timedelta(days=2)), (1, 0, 0))
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_reminders_run_a_constant_number_of_queries(self):
+        """Test that the number of queries does not grow with the number of invoices."""
+        for days in range(-10, 3):
+            self.create_invoice(days)
+        # savepoint, invoices, existing reminders, insert, release
+        with self.assertNumQueries(5):
+            send_invoice_reminders(today=self.today, batch_size=1000)
+
+    def test_reminders_refresh_unread_count(self):
+        """Test that the cached unread count includes the reminders sent."""
+        self.create_invoice(-5)
+        self.assertEqual(unread_count(self.student.pk), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            send_invoice_reminders(today=self.today)
+        self.assertEqual(unread_count(self.student.pk), 1)
+
+    def test_dry_run_command_does_not_send(self):
+        """Test that a dry run only reports what would be sent."""
+        self.create_invoice(-5)
+        out = StringIO()
+        call_command('send_invoice_reminders', dry_run=True, stdout=out)
+        self.assertIn('Would send 1 overdue', out.getvalue())
+        self.assertFalse(Notification.objects.exists())
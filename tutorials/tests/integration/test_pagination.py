@@ -0,0 +1,103 @@
+import json
+from base64 import urlsafe_b64encode
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tutorials.models import User, Notification
+from tutorials.pagination import decode_cursor, encode_cursor, get_page_size, keyset_paginate, paginate
+
+
+class PaginationTestCase(TestCase):
+    """Tests for offset and keyset pagination."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.get(pk=1)
+        created_at = timezone.now() - timedelta(days=1)
+        for number in range(7):
+            Notification.objects.create(user=self.user, message=f'Message {number}')
+        # Give pairs of notifications the same timestamp to exercise the tiebreaker
+        for notification in Notification.objects.order_by('pk'):
+            Notification.objects.filter(pk=notification.pk).update(created_at=created_at + timedelta(minutes=notification.pk // 2))
+        self.ordered = list(Notification.objects.order_by('created_at', 'pk'))
+
+    def walk(self, order_by, page_size):
+        pages = []
+        page = keyset_paginate(Notification.objects.all(), order_by, page_size)
+        pages.append(list(page))
+        while page.has_next():
+            page = keyset_paginate(Notification.objects.all(), order_by, page_size, after=page.next_cursor)
+            pages.append(list(page))
+        return pages, page
+
+    def test_keyset_pages_cover_every_row_once(self):
+        """Test that walking the keyset pages returns every row exactly once."""
+        pages, _ = self.walk('created_at', 3)
+        self.assertEqual([notification for page in pages for notification in page], self.ordered)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+
+    def test_keyset_descending_order(self):
+        """Test keyset pagination in descending order."""
+        pages, _ = self.walk('-created_at', 2)
+        self.assertEqual([notification for page in pages for notification in page], self.ordered[::-1])
+
+    def test_keyset_previous_page(self):
+        """Test paging backwards with the before cursor."""
+        pages, last = self.walk('created_at', 3)
+        previous = keyset_paginate(Notification.objects.all(), 'created_at', 3, before=last.previous_cursor)
+        self.assertEqual(list(previous), pages[1])
+        first = keyset_paginate(Notification.objects.all(), 'created_at', 3, before=previous.previous_cursor)
+        self.assertEqual(list(first), pages[0])
+        self.assertFalse(first.has_previous())
+
+    def test_cursor_round_trip_and_malformed_cursor(self):
+        """Test cursor encoding and that malformed cursors restart from the first page."""
+        notification = self.ordered[0]
+        value, pk = decode_cursor(encode_cursor(notification, 'created_at'))
+        self.assertEqual(value, notification.created_at.isoformat())
+        self.assertEqual(pk, notification.pk)
+        self.assertIsNone(decode_cursor('not a cursor'))
+        page = keyset_paginate(Notification.objects.all(), 'created_at', 3, after='not a cursor')
+        self.assertEqual(list(page), self.ordered[:3])
+
+    def test_invalid_cursor_values_restart_from_first_page(self):
+        """Test that base64 valid cursors holding values of the wrong type return the first page."""
+        for position in (['not a date', 1], [None, 1], [{'a': 1}, 1], ['2024-01-01T00:00:00', 'x'], [1], 'text'):
+            cursor = urlsafe_b64encode(json.dumps(position).encode()).decode()
+            for direction in ('after', 'before'):
+                page = keyset_paginate(Notification.objects.all(), 'created_at', 3, **{direction: cursor})
+                self.assertEqual(list(page), self.ordered[:3])
+
+    def test_cursor_values_are_converted_by_the_field(self):
+        """Test that a cursor value is decoded to the type of the field it orders by."""
+        notification = self.ordered[0]
+        field = Notification._meta.get_field('created_at')
+        self.assertEqual(decode_cursor(encode_cursor(notification, 'created_at'), field), (notification.created_at, notification.pk))
+
+    def test_offset_pagination_for_other_orderings(self):
+        """Test that non keyset orderings use numbered pages."""
+        request = self.factory.get('/', {'page': 2, 'page_size': 5})
+        page = paginate(request, Notification.objects.all(), 'message', keyset_fields=['created_at'])
+        self.assertEqual(page.number, 2)
+        self.assertEqual(len(page), 2)
+
+    @override_settings(ADMIN_LIST_PAGE_SIZE=10)
+    def test_page_size_bounds(self):
+        """Test that the page size falls back to the setting and is clamped."""
+        self.assertEqual(get_page_size(self.factory.get('/')), 10)
+        self.assertEqual(get_page_size(self.factory.get('/', {'page_size': 'x'})), 10)
+        self.assertEqual(get_page_size(self.factory.get('/', {'page_size': 0})), 1)
+        self.assertEqual(get_page_size(self.factory.get('/', {'page_size': 100000})), 200)
+
+    def test_list_view_links_keep_query_parameters(self):
+        """Test that the pagination links keep the filter and search parameters."""
+        self.client.login(username='@johndoe', password='Password123')
+        response = self.client.get(reverse('list_notifications'), {'page_size': 3, 'search': 'Message', 'user': self.user.pk})
+        page = response.context['page']
+        self.assertEqual(len(response.context['notifications']), 3)
+        self.assertContains(response, f'page_size=3&amp;search=Message&amp;user={self.user.pk}&amp;after={page.next_cursor}')
+        response = self.client.get(reverse('list_notifications'), {'page_size': 3, 'after': page.next_cursor})
+        self.assertEqual(list(response.context['notifications']), self.ordered[3:6])
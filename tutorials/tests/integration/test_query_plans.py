@@ -0,0 +1,84 @@
+from unittest import skipUnless
+from django.db import connection
+from django.db.models import Exists, OuterRef, Value
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from tutorials.autocomplete import username_prefix
+from tutorials.billing import uninvoiced_lessons
+from tutorials.forms import BroadcastForm
+from tutorials.models import User, Lesson, Invoice, Notification
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are checked against SQLite')
+class QueryPlanTest(TestCase):
+    """Tests that the hot queries keep using the indexes built for them."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.student = User.objects.get(pk=1)
+        self.tutor = User.objects.get(pk=2)
+        self.now = timezone.now()
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {index}', plan.replace('COVERING INDEX', 'INDEX'))
+
+    def test_dashboard_lessons_use_approved_indexes(self):
+        """Test that the student and tutor dashboards search only approved lessons."""
+        self.assertUsesIndex(Lesson.objects.filter(student=self.student, status='Approved').upcoming(), 'lesson_approved_student_idx')
+        self.assertUsesIndex(Lesson.objects.filter(tutor=self.tutor, status='Approved').upcoming(), 'lesson_approved_tutor_idx')
+
+    def test_next_occurrence_uses_lesson_start_index(self):
+        """Test that the next occurrence of a lesson is found without sorting."""
+        plan = Lesson.objects.filter(student=self.student, status='Approved').upcoming().explain()
+        self.assertIn('occurrence_lesson_start_idx (lesson_id=? AND start>?)', plan)
+
+    def test_schedule_uses_approved_index_with_date_range(self):
+        """Test that a month of a schedule is a range search on the approved lessons."""
+        lessons = Lesson.objects.filter(student=self.student, status='Approved').overlapping(self.now, self.now + timedelta(days=31))
+        self.assertIn('lesson_approved_student_idx (student_id=? AND date<?)', lessons.explain())
+
+    def test_overlap_checks_use_date_indexes(self):
+        """Test that the overlap checks of LessonForm.clean search by user and date."""
+        bookings = Lesson.objects.exclude(status='Rejected')
+        end = self.now + timedelta(days=7)
+        self.assertIn('lesson_student_date_idx (student_id=? AND date<?)', bookings.filter(student=self.student).overlapping(self.now, end).explain())
+        self.assertIn('lesson_tutor_date_idx (tutor_id=? AND date<?)', bookings.filter(tutor=self.tutor).overlapping(self.now, end).explain())
+
+    def test_status_queries_use_status_index(self):
+        """Test that tutor matching and invoicing search lessons by status."""
+        self.assertUsesIndex(Lesson.objects.filter(status='Pending').overlapping(self.now), 'lesson_status_date_idx')
+        self.assertUsesIndex(uninvoiced_lessons(), 'lesson_status_date_idx')
+
+    def test_admin_lists_use_keyset_indexes(self):
+        """Test that the admin lists read their first page in index order."""
+        self.assertUsesIndex(Lesson.objects.filter(date__gte=self.now).order_by('date', 'pk')[:25], 'lesson_date_idx')
+        self.assertUsesIndex(Invoice.objects.order_by('due_date', 'pk')[:25], 'invoice_due_date_idx')
+        self.assertUsesIndex(Notification.objects.order_by('-created_at', '-pk')[:25], 'notification_created_idx')
+
+    def test_invoice_queries_use_invoice_indexes(self):
+        """Test that reminders, billing status and overdue checks use the invoice indexes."""
+        self.assertUsesIndex(Invoice.objects.filter(paid=Value(False), due_date__lte=self.now.date()), 'invoice_paid_due_date_idx')
+        self.assertUsesIndex(Lesson.objects.with_billing_status(), 'invoice_lesson_paid_idx')
+        overdue = Invoice.objects.filter(student=OuterRef('pk'), paid=False, due_date__lt=self.now.date())
+        self.assertUsesIndex(User.objects.filter(Exists(overdue)), 'invoice_unpaid_student_idx')
+
+    def test_notification_queries_use_user_indexes(self):
+        """Test that unread counts and notification lists are searched by user."""
+        self.assertIn('notification_user_unread_idx (user_id=? AND is_read=?)', Notification.objects.filter(user=self.student).unread().explain())
+        plan = Notification.objects.filter(user=self.student).order_by('-created_at', '-pk')[:25].explain()
+        self.assertIn('notification_user_created_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_autocomplete_uses_lower_username_indexes(self):
+        """Test that the case-insensitive username prefix searches are index range searches."""
+        self.assertIn('user_type_username_lower_idx (type=? AND <expr>>? AND <expr><?)', username_prefix(User.objects.filter(type='student'), 'Jo')[:20].explain())
+        self.assertIn('user_username_lower_idx (<expr>>? AND <expr><?)', username_prefix(User.objects.all(), 'Jo')[:20].explain())
+
+    def test_broadcast_lesson_range_seeks_occurrence_starts(self):
+        """Test that the broadcast lesson range is a range search on the occurrence starts."""
+        form = BroadcastForm(data={'message': 'Hello', 'lessons_from': self.now.date(), 'lessons_to': self.now.date()})
+        self.assertTrue(form.is_valid())
+        self.assertIn('occurrence_lesson_start_idx (lesson_id=? AND start>? AND start<?)', form.recipients().explain())
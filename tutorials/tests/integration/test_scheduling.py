@@ -0,0 +1,215 @@
+from django.test import TestCase, override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import datetime, timedelta, date
+from tutorials.models import User, Lesson, Subject
+from django.core.cache import cache
+from django.core.management import call_command
+from io import StringIO
+from tutorials.scheduling import AvailabilityIndex, availability_indexes, available_tutors, find_overlaps, lesson_conflicts, match_pending_lessons
+from tutorials.tests.helpers import LOCAL_CACHES
+import pytz
+
+
+class OverlapDetectionTestCase(TestCase):
+    """Tests for the overlap detection service."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.student = User.objects.get(pk=1)
+        self.subject = Subject.objects.get(pk=1)
+        self.start = datetime(2030, 1, 7, 10, 0, tzinfo=pytz.UTC)
+
+    def test_find_overlaps_sweep(self):
+        """Test find_overlaps pairs only intersecting intervals."""
+        hour = timedelta(hours=1)
+        candidates = [(self.start, self.start + hour, 'a'), (self.start + 3 * hour, self.start + 4 * hour, 'b')]
+        existing = [
+            (self.start - hour, self.start, 'touching'),
+            (self.start + 30 * timedelta(minutes=1), self.start + 2 * hour, 'overlapping'),
+            (self.start - hour, self.start + 5 * hour, 'spanning'),
+        ]
+        overlaps = [(candidate[2], interval[2]) for candidate, interval in find_overlaps(candidates, existing)]
+        self.assertCountEqual(overlaps, [('a', 'overlapping'), ('a', 'spanning'), ('b', 'spanning')])
+
+    def test_lesson_conflicts_with_recurring_lessons(self):
+        """Test lesson_conflicts finds occurrences of existing recurring lessons."""
+        existing = Lesson.objects.create(
+            student=self.student,
+            subject=self.subject,
+            date=self.start - timedelta(weeks=10),
+            duration=60,
+            recurrence='Weekly',
+            recurrence_end_date=date(2030, 12, 31),
+        )
+        dates = [self.start + timedelta(days=day, minutes=30) for day in range(7)]
+        conflicts = lesson_conflicts(Lesson.objects.filter(student=self.student), dates, 60)
+        self.assertEqual(conflicts, [(self.start + timedelta(minutes=30), existing, self.start)])
+
+    def test_lesson_conflicts_uses_one_query(self):
+        """Test lesson_conflicts costs a single query for a long series."""
+        Lesson.objects.create(student=self.student, subject=self.subject, date=self.start, duration=60)
+        dates = [self.start + timedelta(days=day) for day in range(365)]
+        with self.assertNumQueries(1):
+            conflicts = lesson_conflicts(Lesson.objects.filter(student=self.student), dates, 60)
+        self.assertEqual(len(conflicts), 1)
+
+    def test_lesson_conflicts_without_dates(self):
+        """Test lesson_conflicts with an empty series."""
+        with self.assertNumQueries(0):
+            self.assertEqual(lesson_conflicts(Lesson.objects.all(), [], 60), [])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class AvailabilityIndexTestCase(TestCase):
+    """Tests for the tutor availability index."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.get(pk=1)
+        self.tutor = User.objects.get(pk=2)
+        self.subject = Subject.objects.get(pk=1)
+        self.start = (timezone.now() + timedelta(days=7)).replace(hour=10, minute=0, second=0, microsecond=0)
+        self.hour = timedelta(hours=1)
+
+    def test_is_free(self):
+        """Test is_free against long and short booked intervals."""
+        index = AvailabilityIndex([(self.start, self.start + 5 * self.hour), (self.start + self.hour, self.start + 2 * self.hour)])
+        self.assertFalse(index.is_free(self.start + 3 * self.hour, self.start + 4 * self.hour))
+        self.assertTrue(index.is_free(self.start + 5 * self.hour, self.start + 6 * self.hour))
+        self.assertTrue(index.is_free(self.start - self.hour, self.start))
+
+    def test_add_keeps_index_consistent(self):
+        """Test that booking an occurrence updates later overlap answers."""
+        index = AvailabilityIndex([(self.start + 4 * self.hour, self.start + 5 * self.hour)])
+        self.assertTrue(index.is_free(self.start + 2 * self.hour, self.start + 3 * self.hour))
+        index.add(self.start, self.start + 3 * self.hour)
+        self.assertFalse(index.is_free(self.start + 2 * self.hour, self.start + 3 * self.hour))
+        self.assertTrue(index.is_free(self.start + 3 * self.hour, self.start + 4 * self.hour))
+        self.assertEqual(len(index), 2)
+
+    def test_index_is_cached_and_invalidated(self):
+        """Test that the index is cached and rebuilt after a lesson changes."""
+        self.assertEqual(len(availability_indexes([self.tutor.pk])[self.tutor.pk]), 0)
+        with self.assertNumQueries(0):
+            availability_indexes([self.tutor.pk])
+        Lesson.objects.create(student=self.student, tutor=self.tutor, subject=self.subject, date=self.start, duration=60)
+        self.assertEqual(len(availability_indexes([self.tutor.pk])[self.tutor.pk]), 1)
+
+    def test_reassigned_lesson_invalidates_both_tutors(self):
+        """Test that moving a loaded lesson to another tutor rebuilds both indexes without reading the old tutor back."""
+        other = User.objects.create(username='@othertutor', email='other.tutor@example.org', type='tutor')
+        Lesson.objects.create(student=self.student, tutor=self.tutor, subject=self.subject, date=self.start, duration=60)
+        lesson = Lesson.objects.get(tutor=self.tutor)
+        availability_indexes([self.tutor.pk, other.pk])
+        lesson.tutor = other
+        with CaptureQueriesContext(connection) as queries:
+            lesson.save()
+        self.assertFalse(any(query['sql'].startswith('SELECT "tutorials_lesson"."tutor_id"') for query in queries))
+        indexes = availability_indexes([self.tutor.pk, other.pk])
+        self.assertEqual((len(indexes[self.tutor.pk]), len(indexes[other.pk])), (0, 1))
+
+    def test_unrelated_field_updates_keep_the_index(self):
+        """Test that saving fields that do not affect availability neither reads nor drops the index."""
+        lesson = Lesson.objects.create(student=self.student, tutor=self.tutor, subject=self.subject, date=self.start, duration=60)
+        availability_indexes([self.tutor.pk])
+        lesson.subject = Subject.objects.get(pk=2)
+        with self.assertNumQueries(1):
+            lesson.save(update_fields=['subject'])
+        with self.assertNumQueries(0):
+            availability_indexes([self.tutor.pk])
+
+    def test_available_tutors(self):
+        """Test available_tutors skips busy tutors and tutors of other subjects."""
+        other_tutor = User.objects.get(username='@tutor')
+        other_tutor.subjects.add(self.subject)
+        Lesson.objects.create(
+            student=self.student,
+            tutor=self.tutor,
+            subject=self.subject,
+            date=self.start - timedelta(weeks=1),
+            duration=60,
+            recurrence='Weekly',
+            recurrence_end_date=(self.start + timedelta(weeks=4)).date(),
+        )
+        dates = [self.start + timedelta(minutes=30)]
+        self.assertEqual(available_tutors(self.subject, dates, 60), [other_tutor])
+        self.assertEqual(available_tutors(self.subject, [self.start + 2 * self.hour], 60), [self.tutor, other_tutor])
+        self.assertEqual(available_tutors(Subject.objects.exclude(tutors=other_tutor).first(), dates, 60), [])
+
+    def test_available_tutors_ignores_lesson_being_edited(self):
+        """Test that the edited lesson does not make its own tutor unavailable."""
+        lesson = Lesson.objects.create(student=self.student, tutor=self.tutor, subject=self.subject, date=self.start, duration=60)
+        self.assertNotIn(self.tutor, available_tutors(self.subject, [self.start], 60))
+        self.assertIn(self.tutor, available_tutors(self.subject, [self.start], 60, exclude=lesson))
+
+
+class TutorMatchingTestCase(TestCase):
+    """Tests for the bulk tutor matching engine."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.get(pk=1)
+        self.other_student = User.objects.get(username='@student')
+        self.tutor = User.objects.get(pk=2)
+        self.other_tutor = User.objects.get(username='@tutor')
+        self.python = Subject.objects.get(name='Python')
+        self.java = Subject.objects.get(name='Java')
+        self.other_tutor.subjects.set([self.python])
+        self.start = (timezone.now() + timedelta(days=7)).replace(hour=10, minute=0, second=0, microsecond=0)
+
+    def request_lesson(self, student, subject, date, **kwargs):
+        return Lesson.objects.create(student=student, subject=subject, date=date, duration=60, status='Pending', **kwargs)
+
+    def test_matches_free_tutors_teaching_the_subject(self):
+        """Test that clashing requests are spread across free tutors."""
+        first = self.request_lesson(self.student, self.python, self.start)
+        second = self.request_lesson(self.other_student, self.python, self.start + timedelta(minutes=30))
+        third = self.request_lesson(self.other_student, self.java, self.start + timedelta(hours=2))
+        matched, unmatched = match_pending_lessons()
+        self.assertEqual(len(matched), 3)
+        self.assertEqual(unmatched, [])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        third.refresh_from_db()
+        self.assertEqual({first.tutor, second.tutor}, {self.tutor, self.other_tutor})
+        self.assertEqual(third.tutor, self.tutor)
+        self.assertTrue(all(lesson.status == 'Approved' for lesson in [first, second, third]))
+
+    def test_leaves_unmatchable_lessons_pending(self):
+        """Test that lessons without a free tutor stay pending."""
+        Lesson.objects.create(
+            student=self.other_student, tutor=self.tutor, subject=self.java, date=self.start - timedelta(weeks=1),
+            duration=60, status='Approved', recurrence='Weekly', recurrence_end_date=(self.start + timedelta(weeks=2)).date(),
+        )
+        lesson = self.request_lesson(self.student, self.java, self.start)
+        matched, unmatched = match_pending_lessons()
+        self.assertEqual(matched, [])
+        self.assertEqual(unmatched, [lesson])
+        lesson.refresh_from_db()
+        self.assertEqual(lesson.status, 'Pending')
+
+    def test_student_double_booking_is_not_approved(self):
+        """Test that two clashing requests of one student are not both approved."""
+        self.request_lesson(self.student, self.python, self.start)
+        self.request_lesson(self.student, self.python, self.start)
+        matched, unmatched = match_pending_lessons()
+        self.assertEqual((len(matched), len(unmatched)), (1, 1))
+
+    def test_match_tutors_command(self):
+        """Test the match_tutors command reports and saves the matches."""
+        lesson = self.request_lesson(self.student, self.python, self.start)
+        output = StringIO()
+        call_command('match_tutors', '--dry-run', stdout=output)
+        self.assertIn('Matched 1 lessons, 0 left pending.', output.getvalue())
+        lesson.refresh_from_db()
+        self.assertEqual(lesson.status, 'Pending')
+        call_command('match_tutors', stdout=StringIO())
+        lesson.refresh_from_db()
+        self.assertEqual(lesson.status, 'Approved')
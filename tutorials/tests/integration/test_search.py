@@ -0,0 +1,104 @@
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from tutorials.filters import filter_users, filter_lessons, filter_invoices, filter_notifications
+from tutorials.models import User, Lesson, Invoice, Notification, Subject
+from tutorials.search import install_search_indexes, matching, search_table, uses_fts
+
+
+class SearchTest(TestCase):
+    """Tests for the indexed admin list search."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.student = User.objects.get(pk=1)
+        self.tutor = User.objects.get(pk=2)
+        self.subject = Subject.objects.get(pk=1)
+
+    def create_user(self, username, email, **kwargs):
+        return User.objects.create_user(username=username, email=email, password='Password123', first_name='First', last_name='Last', **kwargs)
+
+    def search_users(self, query):
+        return set(filter_users(User.objects.all(), {'search': query}))
+
+    def test_user_search_matches_substrings_of_any_column(self):
+        """Test that users are found by part of their username, email or names, ignoring case."""
+        user = self.create_user('@marjorie', 'm.quinn@example.org', type='tutor')
+        self.assertIn(user, self.search_users('JORI'))
+        self.assertIn(user, self.search_users('quinn@'))
+        self.assertIn(self.student, self.search_users(self.student.last_name[1:].upper()))
+        self.assertNotIn(user, self.search_users('nobody'))
+
+    def test_short_queries_fall_back_to_icontains(self):
+        """Test that queries shorter than a trigram still find users."""
+        user = self.create_user('@xq', 'xq@example.org')
+        self.assertIn(user, self.search_users('xq'))
+
+    def test_index_follows_updates_deletes_and_bulk_writes(self):
+        """Test that the search index follows every kind of write."""
+        user = self.create_user('@before', 'before@example.org')
+        user.username = '@renamed'
+        user.save()
+        self.assertEqual(self.search_users('@before'), set())
+        self.assertEqual(self.search_users('renamed'), {user})
+        User.objects.filter(pk=user.pk).update(email='updated@example.org')
+        self.assertEqual(self.search_users('updated@'), {user})
+        user.delete()
+        self.assertEqual(self.search_users('renamed'), set())
+        User.objects.bulk_create([User(username='@bulkuser', email='bulk@example.org')])
+        self.assertEqual(len(self.search_users('bulkus')), 1)
+
+    def test_quotes_in_queries_are_searched_literally(self):
+        """Test that search syntax in a query is not interpreted."""
+        notification = Notification.objects.create(user=self.student, message='Say "hello" OR goodbye')
+        found = filter_notifications(Notification.objects.all(), {'search': '"hello" OR'})
+        self.assertEqual(list(found), [notification])
+        self.assertEqual(list(filter_notifications(Notification.objects.all(), {'search': 'hello*'})), [])
+
+    def test_prefix_matches_are_listed_first(self):
+        """Test that username and email prefix matches rank first in the user list."""
+        self.assertTrue(self.client.login(username='@johndoe', password='Password123'))
+        inner = self.create_user('@zzsmith', 'zz@example.org')
+        prefix = self.create_user('@smithy', 'smithy@example.org')
+        response = self.client.get(reverse('list_users'), {'search': 'smith', 'order_by': 'username'})
+        self.assertEqual(response.status_code, 200)
+        users = list(response.context['users'])
+        self.assertEqual(users[0], prefix)
+        self.assertIn(inner, users)
+
+    def test_lessons_are_found_by_usernames_and_subject_without_joins(self):
+        """Test that the lesson search matches related rows through their own indexes."""
+        lesson = Lesson.objects.create(student=self.student, tutor=self.tutor, subject=self.subject, date=timezone.now() + timedelta(days=1), duration=60)
+        for query in (self.student.username[1:], self.tutor.username, self.subject.name.lower()):
+            lessons = filter_lessons(Lesson.objects.all(), {'search': query})
+            self.assertEqual(list(lessons), [lesson])
+        self.assertNotIn('JOIN', str(filter_lessons(Lesson.objects.all(), {'search': 'anything'}).query))
+
+    def test_invoices_are_found_by_username_and_exact_amount(self):
+        """Test that invoices are found by student username or amount."""
+        invoice = Invoice.objects.create(student=self.student, amount=Decimal('45.00'), due_date=timezone.now().date())
+        self.assertEqual(list(filter_invoices(Invoice.objects.all(), {'search': self.student.username})), [invoice])
+        self.assertEqual(list(filter_invoices(Invoice.objects.all(), {'search': '45'})), [invoice])
+        self.assertEqual(list(filter_invoices(Invoice.objects.all(), {'search': '4'})), [])
+
+    def test_notifications_are_found_by_message(self):
+        """Test that notifications are found by part of their message."""
+        notification = Notification.objects.create(user=self.student, message='Your lesson was approved')
+        self.assertEqual(list(filter_notifications(Notification.objects.all(), {'search': 'APPROV'})), [notification])
+
+    def test_lost_triggers_are_restored_and_index_rebuilt(self):
+        """Test that installing the indexes after a table rebuild restores the triggers and contents."""
+        if not uses_fts():
+            self.skipTest('FTS5 trigram tokenizer not available')
+        table = search_table(User)
+        with connection.cursor() as cursor:
+            for suffix in ('insert', 'delete', 'update'):
+                cursor.execute(f'DROP TRIGGER "{table}_{suffix}"')
+        user = self.create_user('@untracked', 'untracked@example.org')
+        self.assertFalse(User.objects.filter(pk__in=matching(User, 'untracked')).exists())
+        install_search_indexes()
+        self.assertEqual(list(User.objects.filter(pk__in=matching(User, 'untracked'))), [user])
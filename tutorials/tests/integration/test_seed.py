@@ -0,0 +1,108 @@
+from django.core.management import call_command
+from django.test import TestCase
+from io import StringIO
+from tutorials.models import User, Subject, Lesson, LessonOccurrence, Invoice, Notification
+from tutorials.seeding import Seeder, create_username
+
+
+class SeedCommandTest(TestCase):
+    """Tests for the bulk seed command."""
+
+    def seed(self, **options):
+        call_command('seed', stdout=StringIO(), **options)
+
+    def test_seed_creates_requested_scale(self):
+        self.seed(users=40, lessons=60, seed=1)
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(Subject.objects.count(), len(Subject.SUBJECT_CHOICES))
+        self.assertEqual(Lesson.objects.count(), 63)
+        self.assertEqual(Invoice.objects.filter(lesson__isnull=False).count(), Lesson.objects.filter(status='Approved').count())
+        self.assertTrue(Notification.objects.exists())
+
+    def test_seeded_users_share_the_default_password(self):
+        self.seed(users=10, seed=2)
+        passwords = set(User.objects.values_list('password', flat=True))
+        self.assertEqual(len(passwords), 1)
+        self.assertTrue(User.objects.get(username='@charlie').check_password('Password123'))
+        self.assertTrue(User.objects.get(username='@johndoe').is_superuser)
+
+    def test_seeded_lessons_have_occurrences(self):
+        self.seed(users=20, lessons=30, seed=3)
+        for lesson in Lesson.objects.all():
+            self.assertEqual(list(lesson.occurrences.values_list('start', flat=True)), lesson.lesson_dates())
+
+    def test_seed_is_reproducible(self):
+        Seeder(users=30, lessons=20, seed=4).seed()
+        first = list(User.objects.order_by('pk').values_list('first_name', 'last_name', 'type'))
+        User.objects.all().delete()
+        Seeder(users=30, lessons=20, seed=4).seed()
+        second = list(User.objects.order_by('pk').values_list('first_name', 'last_name', 'type'))
+        self.assertEqual(first, second)
+
+    def test_seed_does_not_duplicate_existing_users(self):
+        self.seed(users=15, seed=5)
+        self.seed(users=15, seed=5)
+        self.assertEqual(User.objects.count(), 15)
+
+    def test_workers_generate_the_same_data(self):
+        Seeder(users=30, lessons=40, seed=6, batch_size=8).seed()
+        first = self.snapshot()
+        User.objects.all().delete()
+        Seeder(users=30, lessons=40, seed=6, batch_size=8, workers=2).seed()
+        self.assertEqual(self.snapshot(), first)
+
+    def test_workers_generate_unique_users(self):
+        self.seed(users=60, seed=7, batch_size=10, workers=2)
+        self.assertEqual(User.objects.count(), 60)
+        self.assertEqual(User.objects.values('email').distinct().count(), 60)
+        for lesson in Lesson.objects.all():
+            self.assertEqual(list(lesson.occurrences.values_list('start', flat=True)), lesson.lesson_dates())
+
+    def snapshot(self):
+        users = list(User.objects.order_by('pk').values_list('first_name', 'last_name', 'type'))
+        lessons = list(Lesson.objects.order_by('pk').values_list('student__first_name', 'duration', 'status', 'recurrence'))
+        occurrences = LessonOccurrence.objects.count()
+        return users, lessons, occurrences
+
+    def test_username_is_valid_and_fits_the_field(self):
+        username = create_username("Maximilian-Alexander", "O'Sullivan-Worthington", 123456)
+        self.assertRegex(username, r'^@\w{3,}$')
+        self.assertLessEqual(len(username), 30)
+        self.assertTrue(username.endswith('123456'))
+
+
+class UnseedCommandTest(TestCase):
+    """Tests for the bulk unseed command."""
+
+    def setUp(self):
+        Seeder(users=30, lessons=20, seed=8).seed()
+
+    def unseed(self, **options):
+        call_command('unseed', stdout=StringIO(), **options)
+
+    def test_unseed_removes_all_data(self):
+        self.unseed()
+        for model in [User, Subject, Lesson, LessonOccurrence, Invoice, Notification, User.subjects.through]:
+            self.assertFalse(model.objects.exists(), model.__name__)
+
+    def test_unseed_can_keep_subjects_and_admins(self):
+        admins = set(User.objects.filter(type='admin').values_list('pk', flat=True))
+        self.unseed(keep_subjects=True, keep_admins=True)
+        self.assertEqual(set(User.objects.values_list('pk', flat=True)), admins)
+        self.assertEqual(Subject.objects.count(), len(Subject.SUBJECT_CHOICES))
+        for model in [Lesson, LessonOccurrence, Invoice, Notification, User.subjects.through]:
+            self.assertFalse(model.objects.exists(), model.__name__)
+
+    def test_unseed_keeping_admins_removes_other_users_and_subjects(self):
+        self.unseed(keep_admins=True)
+        self.assertFalse(Subject.objects.exists())
+        self.assertFalse(User.objects.exclude(type='admin').exists())
+
+    def test_seed_after_unseed(self):
+        self.unseed(keep_subjects=True)
+        Seeder(users=10, seed=9).seed()
+        self.assertEqual(User.objects.count(), 10)
+
+    def test_unseed_resets_primary_key_sequences(self):
+        self.unseed()
+        self.assertEqual(Subject.objects.create(name='Python').pk, 1)
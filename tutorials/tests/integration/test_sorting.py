@@ -0,0 +1,68 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tutorials.models import User, Lesson, Invoice, Notification, Subject
+from tutorials.sorting import SORTS, Sort
+
+LIST_VIEWS = {
+    'users': 'list_users',
+    'lessons': 'list_lessons',
+    'invoices': 'list_invoices',
+    'notifications': 'list_notifications',
+}
+
+
+class SortingTest(TestCase):
+    """Tests for the whitelisted sort keys of the admin lists."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.client.login(username='@johndoe', password='Password123')
+        student, tutor = User.objects.get(pk=1), User.objects.get(pk=2)
+        date = timezone.now() + timedelta(days=1)
+        for subject in Subject.objects.all()[:2]:
+            lesson = Lesson.objects.create(student=student, tutor=tutor, subject=subject, date=date, duration=60, status='Approved')
+            Invoice.objects.create(student=student, lesson=lesson, amount=30, due_date=date.date())
+            Notification.objects.create(user=student, message=f'{subject.name} lesson approved')
+
+    def test_every_key_sorts_in_both_directions(self):
+        """Test that every public key of every list renders in both directions."""
+        for name, sort in SORTS.items():
+            for key in sort.keys:
+                for order_by in (key, f'-{key}'):
+                    with self.subTest(list=name, order_by=order_by):
+                        response = self.client.get(reverse(LIST_VIEWS[name]), {'order_by': order_by})
+                        self.assertEqual(response.status_code, 200)
+                        self.assertEqual(response.context['order_by'], order_by)
+
+    def test_unknown_keys_fall_back_to_the_default(self):
+        """Test that unknown keys, including lookups on private columns, use the default order."""
+        for order_by in ('password', 'student__password', '--date', 'date,duration', ''):
+            with self.subTest(order_by=order_by):
+                response = self.client.get(reverse('list_lessons'), {'order_by': order_by})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['order_by'], 'date')
+
+    def test_end_date_key_orders_by_recurrence_end_date(self):
+        """Test that the end date column of the lesson list sorts by the recurrence end date."""
+        self.assertEqual(SORTS['lessons'].columns('-end_date'), ['-recurrence_end_date', '-date'])
+
+    def test_related_keys_do_not_use_related_meta_ordering(self):
+        """Test that sorting lessons by student orders by username, not the user's Meta.ordering."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('list_lessons'), {'order_by': 'student'})
+        lesson_queries = [query['sql'] for query in queries if 'FROM "tutorials_lesson"' in query['sql'] and 'ORDER BY' in query['sql']]
+        self.assertTrue(lesson_queries)
+        for sql in lesson_queries:
+            self.assertNotIn('last_name" ASC', sql.split('ORDER BY')[-1])
+
+    def test_columns_follow_the_key_direction(self):
+        """Test that descending keys order every column descending."""
+        sort = Sort('name', {'name': ['last_name', 'first_name']})
+        self.assertEqual(sort.key('-name'), '-name')
+        self.assertEqual(sort.columns('-name'), ['-last_name', '-first_name'])
+        self.assertEqual(sort.key('unknown'), 'name')
@@ -1,8 +1,11 @@
+from django.db import connection
+from django.db.models import Value
 from django.test import TestCase
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from datetime import timedelta
-from tutorials.models import User, Lesson, Invoice, Subject
+from decimal import Decimal
+from tutorials.models import User, Lesson, Invoice, Subject, WholeDivision
 
 class LessonModelTest(TestCase):
     """Tests for the Lesson model."""
@@ -335,3 +338,108 @@ class LessonModelTest(TestCase):
             duration=self.duration,
         )
         self.assertIn(lesson, self.student.lessons.all())
+
+    def test_upcoming_excludes_past_lessons(self):
+        """Test that the upcoming queryset only returns lessons with future occurrences."""
+        future_lesson = Lesson.objects.create(
+            student=self.student,
+            subject=self.subject,
+            date=self.date,
+            duration=self.duration,
+        )
+        Lesson.objects.create(
+            student=self.student,
+            subject=self.subject,
+            date=timezone.now() - timedelta(days=1),
+            duration=self.duration,
+        )
+        self.assertEqual(list(Lesson.objects.upcoming()), [future_lesson])
+
+    def test_upcoming_includes_recurring_lessons_started_in_the_past(self):
+        """Test that a recurring lesson with future occurrences is upcoming."""
+        start = timezone.now() - timedelta(days=10)
+        lesson = Lesson.objects.create(
+            student=self.student,
+            subject=self.subject,
+            date=start,
+            duration=self.duration,
+            recurrence='Weekly',
+            recurrence_end_date=start.date() + timedelta(weeks=3),
+        )
+        upcoming = Lesson.objects.upcoming().get()
+        self.assertEqual(upcoming, lesson)
+        self.assertEqual(upcoming.next_occurrence, start + timedelta(weeks=2))
+        self.assertEqual(upcoming.next_lesson(), start + timedelta(weeks=2))
+
+    def test_overlapping_filters_by_series_span(self):
+        """Test that overlapping keeps lessons whose series reaches the window."""
+        window_start = self.date + timedelta(days=7)
+        window_end = window_start + timedelta(days=1)
+        recurring = Lesson.objects.create(
+            student=self.student,
+            subject=self.subject,
+            date=self.date,
+            duration=self.duration,
+            recurrence='Daily',
+            recurrence_end_date=self.recurrence_end_date,
+        )
+        Lesson.objects.create(
+            student=self.student,
+            subject=self.subject,
+            date=self.date,
+            duration=self.duration,
+        )
+        self.assertEqual(list(Lesson.objects.overlapping(window_start, window_end)), [recurring])
+        self.assertEqual(recurring.occurrences_between(window_start, window_end), [window_start])
+
+    def test_with_invoice_amount_agrees_with_occurrences(self):
+        """Test that the SQL invoice amount prices every stored occurrence."""
+        late_evening = self.date.replace(hour=23, minute=30)
+        series = [
+            ('None', None),
+            ('Daily', self.date.date()),
+            ('Daily', self.date.date() + timedelta(days=3)),
+            ('Weekly', self.date.date() + timedelta(days=20)),
+            ('Weekly', self.date.date() + timedelta(days=21)),
+            ('Monthly', self.date.date() + timedelta(days=61)),
+            ('Monthly', self.date.date() - timedelta(days=1)),
+            ('Weekly', None),
+        ]
+        for recurrence, end_date in series:
+            for date in [self.date, late_evening]:
+                Lesson.objects.create(
+                    student=self.student,
+                    subject=self.subject,
+                    date=date,
+                    duration=90,
+                    recurrence=recurrence,
+                    recurrence_end_date=end_date,
+                )
+        for lesson in Lesson.objects.with_invoice_amount():
+            with self.subTest(recurrence=lesson.recurrence, date=lesson.date, end=lesson.recurrence_end_date):
+                occurrences = lesson.occurrences.count()
+                self.assertEqual(lesson.occurrence_total, occurrences)
+                self.assertEqual(lesson.invoice_amount, 45 * occurrences)
+
+    def test_occurrence_counts_divide_whole_days(self):
+        """Test that the occurrence count divides days into whole intervals, with DIV on MySQL."""
+        lesson = Lesson.objects.create(student=self.student, subject=self.subject, date=self.date, duration=self.duration)
+        query = Lesson.objects.all().query
+        compiler = query.get_compiler(connection=connection)
+        self.assertIn(' DIV ', WholeDivision(Value(20), Value(7)).resolve_expression(query).as_mysql(compiler, connection)[0])
+        self.assertEqual(Lesson.objects.annotate(weeks=WholeDivision(Value(20), Value(7))).get(pk=lesson.pk).weeks, 2)
+
+    def test_with_billing_status_annotates_invoices(self):
+        """Test that the billing annotations match the per lesson queries."""
+        lessons = [
+            Lesson.objects.create(student=self.student, subject=self.subject, date=self.date, duration=self.duration)
+            for _ in range(3)
+        ]
+        Invoice.objects.create(student=self.student, lesson=lessons[1], amount=20, due_date=self.date.date())
+        Invoice.objects.create(student=self.student, lesson=lessons[2], amount=20, due_date=self.date.date(), paid=True)
+        Invoice.objects.create(student=self.student, lesson=lessons[2], amount=15.5, due_date=self.date.date())
+        annotated = {lesson.pk: lesson for lesson in Lesson.objects.with_billing_status()}
+        with self.assertNumQueries(0):
+            status = [(annotated[lesson.pk].has_invoice(), annotated[lesson.pk].paid(), annotated[lesson.pk].invoiced_amount) for lesson in lessons]
+        self.assertEqual(status, [(False, False, 0), (True, False, 20), (True, True, Decimal('35.50'))])
+        self.assertEqual([(lesson.has_invoice(), lesson.paid()) for lesson in lessons], [row[:2] for row in status])
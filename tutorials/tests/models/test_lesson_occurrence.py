@@ -0,0 +1,72 @@
+from django.test import TestCase
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+from tutorials.models import User, Lesson, LessonOccurrence, Subject
+
+class LessonOccurrenceModelTest(TestCase):
+    """Tests for the LessonOccurrence model."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.student = User.objects.get(pk=1)
+        self.tutor = User.objects.get(pk=2)
+        self.subject = Subject.objects.get(pk=1)
+        self.date = timezone.now() + timedelta(days=1)
+
+    def create_lesson(self, **kwargs):
+        data = {
+            'student': self.student,
+            'subject': self.subject,
+            'tutor': self.tutor,
+            'date': self.date,
+            'duration': 60,
+        }
+        data.update(kwargs)
+        return Lesson.objects.create(**data)
+
+    def test_single_lesson_has_one_occurrence(self):
+        """Test that a non recurring lesson stores a single occurrence."""
+        lesson = self.create_lesson()
+        occurrences = list(lesson.occurrences.all())
+        self.assertEqual(len(occurrences), 1)
+        self.assertEqual(occurrences[0].start, self.date)
+        self.assertEqual(occurrences[0].end, self.date + timedelta(minutes=60))
+
+    def test_recurring_lesson_occurrences_match_lesson_dates(self):
+        """Test that the stored occurrences match the computed lesson dates."""
+        lesson = self.create_lesson(recurrence='Weekly', recurrence_end_date=self.date.date() + timedelta(weeks=4))
+        starts = list(lesson.occurrences.values_list('start', flat=True))
+        self.assertEqual(starts, lesson.lesson_dates())
+        self.assertEqual(len(starts), 5)
+
+    def test_occurrences_follow_schedule_changes(self):
+        """Test that updating the schedule of a lesson rebuilds its occurrences."""
+        lesson = self.create_lesson(recurrence='Daily', recurrence_end_date=self.date.date() + timedelta(days=6))
+        self.assertEqual(lesson.occurrences.count(), 7)
+        lesson.recurrence = 'None'
+        lesson.recurrence_end_date = None
+        lesson.save()
+        self.assertEqual(lesson.occurrences.count(), 1)
+
+    def test_occurrences_deleted_with_lesson(self):
+        """Test that deleting a lesson deletes its occurrences."""
+        lesson = self.create_lesson(recurrence='Daily', recurrence_end_date=self.date.date() + timedelta(days=2))
+        lesson.delete()
+        self.assertEqual(LessonOccurrence.objects.count(), 0)
+
+    def test_next_lesson_uses_occurrences(self):
+        """Test that the next lesson skips past occurrences."""
+        start = timezone.now() - timedelta(days=2)
+        lesson = self.create_lesson(date=start, recurrence='Daily', recurrence_end_date=start.date() + timedelta(days=5))
+        self.assertEqual(lesson.next_lesson(), start + timedelta(days=3))
+        self.assertTrue(lesson.is_upcoming())
+
+    def test_backfill_command_rebuilds_occurrences(self):
+        """Test that the backfill command restores missing occurrences."""
+        lesson = self.create_lesson(recurrence='Weekly', recurrence_end_date=self.date.date() + timedelta(weeks=2))
+        LessonOccurrence.objects.all().delete()
+        call_command('backfill_occurrences', batch_size=1, stdout=StringIO())
+        self.assertEqual(lesson.occurrences.count(), 3)
@@ -3,6 +3,7 @@ from django.urls import reverse
 from tutorials.models import User, Lesson, Invoice, Notification, Subject
 from datetime import date, timedelta
 from django.utils import timezone
+from django.core.cache import cache
 
 class AdminViewTestCase(TestCase):
     """Tests for the admin views."""
@@ -167,6 +168,20 @@ class AdminViewTestCase(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertTrue(Lesson.objects.filter(student=student, subject=subject).exists())
 
+    def test_update_lesson_view_suggests_tutors(self):
+        """Test that the lesson form lists the tutors free for the lesson."""
+        cache.clear()
+        lesson = Lesson.objects.create(
+            student=User.objects.get(pk=1),
+            subject=Subject.objects.get(pk=1),
+            date=timezone.now() + timedelta(days=3),
+            duration=60,
+        )
+        response = self.client.get(reverse('update_lesson', args=[lesson.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(User.objects.get(username='@janedoe'), response.context['suggested_tutors'])
+        self.assertContains(response, 'Available tutors')
+
     def test_list_invoices_view(self):
         """Test the list invoices view."""
         response = self.client.get(reverse('list_invoices'))
@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tutorials.autocomplete import AUTOCOMPLETE_LIMIT, autocomplete
+from tutorials.forms import LessonForm, InvoiceForm, NotificationForm
+from tutorials.models import User, Lesson, Subject
+from tutorials.tests.helpers import LOCAL_CACHES
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class AutocompleteTest(TestCase):
+    """Tests for the autocomplete lookups of the admin form dropdowns."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.get(username='@charlie')
+        self.tutor = User.objects.get(username='@janedoe')
+        self.subject = Subject.objects.get(pk=1)
+        self.lesson = Lesson.objects.create(student=self.student, tutor=self.tutor, subject=self.subject, date=timezone.now() + timedelta(days=1), duration=60)
+        self.client.login(username='@johndoe', password='Password123')
+
+    def search(self, name, **params):
+        response = self.client.get(reverse('autocomplete', args=[name]), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_students_match_username_prefix(self):
+        """Test that students are matched on a username prefix, with or without the '@'."""
+        expected = [{'id': self.student.pk, 'text': str(self.student)}]
+        self.assertEqual(self.search('students', q='char'), expected)
+        self.assertEqual(self.search('students', q='@char'), expected)
+        self.assertEqual(self.search('students', q='harlie'), [])
+
+    def test_username_prefix_ignores_case(self):
+        """Test that mixed-case usernames are found whatever the case of the term."""
+        user = User.objects.create(username='@JaneSmithX', email='jane.smith@example.org', type='student')
+        for term in ('jane', 'Jane', 'JANES', '@janesmithx'):
+            self.assertEqual([result['id'] for result in self.search('students', q=term)], [user.pk])
+        self.assertEqual([result['id'] for result in self.search('students', q='CHAR')], [self.student.pk])
+
+    def test_lookups_only_return_their_user_type(self):
+        """Test that the student and tutor lookups exclude the other user types."""
+        self.assertEqual(self.search('students', q='jane'), [])
+        self.assertEqual([result['id'] for result in self.search('tutors', q='jane')], [self.tutor.pk])
+        self.assertIn(self.tutor.pk, [result['id'] for result in self.search('users', q='jane')])
+
+    def test_results_are_limited(self):
+        """Test that a search returns at most AUTOCOMPLETE_LIMIT options, in username order."""
+        User.objects.bulk_create(User(username=f'@pupil{index:02}', email=f'pupil{index}@example.org', type='student') for index in range(AUTOCOMPLETE_LIMIT + 5))
+        results = self.search('students', q='pupil')
+        self.assertEqual(len(results), AUTOCOMPLETE_LIMIT)
+        self.assertEqual(results[0]['text'], 'pupil00')
+
+    def test_lessons_need_the_forwarded_student(self):
+        """Test that lessons are only listed for the student chosen in the form."""
+        self.assertEqual(self.search('lessons'), [])
+        self.assertEqual(self.search('lessons', student='abc'), [])
+        self.assertEqual(self.search('lessons', student=self.student.pk), [{'id': self.lesson.pk, 'text': str(self.lesson)}])
+        self.assertEqual(self.search('lessons', student=self.student.pk, q=self.subject.name[:2]), [{'id': self.lesson.pk, 'text': str(self.lesson)}])
+        self.assertEqual(self.search('lessons', student=self.tutor.pk), [])
+
+    def test_searches_are_cached(self):
+        """Test that repeating a search costs no queries."""
+        autocomplete('students', 'char')
+        with self.assertNumQueries(0):
+            self.assertEqual(len(autocomplete('students', 'char')), 1)
+
+    def test_renamed_user_refreshes_the_options(self):
+        """Test that saving a username moves the user lookups to new options."""
+        autocomplete('students', 'char')
+        self.student.username = '@chuck'
+        self.student.save(update_fields=['username'])
+        self.assertEqual(autocomplete('students', 'char'), [])
+        self.assertEqual([result['id'] for result in autocomplete('students', 'chu')], [self.student.pk])
+
+    def test_unknown_lookup_is_not_found(self):
+        response = self.client.get(reverse('autocomplete', args=['passwords']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_lookups_are_admin_only(self):
+        self.client.login(username='@charlie', password='Password123')
+        response = self.client.get(reverse('autocomplete', args=['users']), {'q': 'john'})
+        self.assertNotEqual(response.status_code, 200)
+
+    def test_forms_render_only_the_selected_options(self):
+        """Test that the user and lesson dropdowns render the blank and selected options only."""
+        form = LessonForm(instance=self.lesson)
+        student = form['student'].as_widget()
+        self.assertIn(f'data-autocomplete="{reverse("autocomplete", args=["students"])}"', student)
+        self.assertEqual(student.count('<option'), 2)
+        self.assertIn(f'<option value="{self.student.pk}" selected>', student)
+        self.assertEqual(NotificationForm()['user'].as_widget().count('<option'), 1)
+        lesson = InvoiceForm(initial={'student': self.student, 'lesson': self.lesson})['lesson'].as_widget()
+        self.assertIn('data-forward="student"', lesson)
+        self.assertIn(f'<option value="{self.lesson.pk}" selected>', lesson)
+
+    def test_forms_validate_the_chosen_user(self):
+        """Test that a submitted pk is still checked against the field's user type."""
+        form = NotificationForm(data={'user': self.tutor.pk, 'message': 'Hello'})
+        self.assertTrue(form.is_valid())
+        form = InvoiceForm(data={'student': self.tutor.pk, 'amount': 10, 'due_date': timezone.now().date(), 'paid': False})
+        self.assertFalse(form.is_valid())
+        self.assertIn('student', form.errors)
@@ -0,0 +1,41 @@
+from django.test import TestCase
+from django.urls import reverse
+from tutorials.models import User, Notification
+
+class BroadcastViewTestCase(TestCase):
+    """Tests for the admin notification broadcast view."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.url = reverse('broadcast_notification')
+        self.client.login(username='@johndoe', password='Password123')
+        self.data = {'message': 'The centre is closed on Monday.', 'type': 'student'}
+
+    def test_get_broadcast_page(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'admin/broadcast_notification.html')
+        self.assertIsNone(response.context['recipient_count'])
+
+    def test_preview_shows_recipient_count_without_sending(self):
+        response = self.client.post(self.url, {**self.data, 'action': 'preview'})
+        self.assertEqual(response.context['recipient_count'], User.objects.filter(type='student').count())
+        self.assertFalse(Notification.objects.exists())
+
+    def test_send_creates_one_notification_per_recipient(self):
+        students = User.objects.filter(type='student')
+        response = self.client.post(self.url, {**self.data, 'action': 'send'})
+        self.assertRedirects(response, reverse('list_notifications'))
+        self.assertEqual(Notification.objects.count(), students.count())
+        self.assertEqual(set(Notification.objects.values_list('user', flat=True)), set(students.values_list('pk', flat=True)))
+
+    def test_invalid_form_does_not_send(self):
+        self.client.post(self.url, {'message': '', 'action': 'send'})
+        self.assertFalse(Notification.objects.exists())
+
+    def test_students_cannot_broadcast(self):
+        self.client.login(username='@charlie', password='Password123')
+        response = self.client.post(self.url, {**self.data, 'action': 'send'})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Notification.objects.exists())
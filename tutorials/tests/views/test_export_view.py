@@ -0,0 +1,61 @@
+import csv
+import json
+from django.core.management import call_command
+from django.test import TestCase
+from io import StringIO
+from django.urls import reverse
+from tutorials.models import Invoice
+
+
+class ExportViewTest(TestCase):
+    """Tests for the streaming admin exports."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json', 'tutorials/tests/fixtures/lessons.json', 'tutorials/tests/fixtures/invoices.json']
+
+    def setUp(self):
+        self.client.login(username='@johndoe', password='Password123')
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_invoices_export_as_csv(self):
+        response = self.client.get(reverse('export', args=['invoices']), {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('invoices.csv', response['Content-Disposition'])
+        rows = list(csv.reader(self.read(response).splitlines()))
+        self.assertEqual(rows[0], ['id', 'student', 'lesson', 'amount', 'due_date', 'paid'])
+        self.assertEqual(len(rows) - 1, Invoice.objects.count())
+
+    def test_export_honours_list_filters(self):
+        response = self.client.get(reverse('export', args=['invoices']), {'format': 'jsonl', 'paid': 'False', 'student': '1'})
+        records = [json.loads(line) for line in self.read(response).splitlines()]
+        expected = Invoice.objects.filter(paid=False, student_id=1)
+        self.assertEqual([record['id'] for record in records], list(expected.order_by('pk').values_list('pk', flat=True)))
+
+    def test_users_export_honours_search(self):
+        response = self.client.get(reverse('export', args=['users']), {'format': 'jsonl', 'search': 'charlie'})
+        records = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([record['username'] for record in records], ['@charlie'])
+
+    def test_lessons_export_includes_billing_columns(self):
+        response = self.client.get(reverse('export', args=['lessons']), {'format': 'csv'})
+        header = next(csv.reader(self.read(response).splitlines()))
+        self.assertEqual(header[-3:], ['invoiced', 'paid', 'invoiced_amount'])
+
+    def test_unknown_export_returns_404(self):
+        self.assertEqual(self.client.get(reverse('export', args=['notes'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('export', args=['users']), {'format': 'xml'}).status_code, 404)
+
+    def test_students_cannot_export(self):
+        self.client.login(username='@charlie', password='Password123')
+        response = self.client.get(reverse('export', args=['users']))
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_command_streams_filtered_rows(self):
+        out = StringIO()
+        call_command('export', 'invoices', format='jsonl', filter=['paid=True'], stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(records), Invoice.objects.filter(paid=True).count())
+        self.assertTrue(all(record['paid'] for record in records))
@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tutorials.models import User, Lesson, Subject, Invoice, Notification
+from tutorials.notifications import broadcast
+from tutorials.options import filter_options, filter_options_cache_key, filter_options_version_key
+from tutorials.tests.helpers import LOCAL_CACHES
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class FilterOptionsTest(TestCase):
+    """Tests for the cached dropdown options of the admin list filters."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.get(pk=1)
+        self.tutor = User.objects.get(pk=2)
+        self.subject = Subject.objects.get(pk=1)
+        self.date = timezone.now() + timedelta(days=1)
+        self.lesson = self.create_lesson(duration=90, recurrence='Weekly', recurrence_end_date=self.date.date() + timedelta(weeks=2))
+        self.create_lesson(date=timezone.now() - timedelta(days=30), duration=120)
+        self.client.login(username='@johndoe', password='Password123')
+
+    def create_lesson(self, **kwargs):
+        data = {'student': self.student, 'tutor': self.tutor, 'subject': self.subject, 'date': self.date, 'duration': 60}
+        data.update(kwargs)
+        return Lesson.objects.create(**data)
+
+    def test_lesson_options_come_from_upcoming_lessons(self):
+        """Test that the lesson options list what upcoming lessons use."""
+        options = filter_options('lessons')
+        self.assertEqual([user.pk for user in options['students_with_lessons']], [self.student.pk])
+        self.assertEqual(str(options['students_with_lessons'][0]), str(self.student))
+        self.assertEqual([user.pk for user in options['tutors_with_lessons']], [self.tutor.pk])
+        self.assertEqual([subject.name for subject in options['subjects']], [self.subject.name])
+        self.assertEqual(options['durations'], [90])
+        self.assertEqual(options['recurrences'], ['Weekly'])
+
+    def test_lesson_options_are_computed_with_one_query(self):
+        """Test that all the lesson dropdowns are filled by a single query."""
+        with self.assertNumQueries(1):
+            filter_options('lessons')
+
+    def test_cached_options_cost_no_queries(self):
+        """Test that a warm cache serves the dropdowns of every list without queries."""
+        for name in ('lessons', 'invoices', 'notifications'):
+            filter_options(name)
+            with self.assertNumQueries(0):
+                filter_options(name)
+
+    def test_list_renders_cached_options(self):
+        """Test that the lesson list renders the dropdowns without the DISTINCT queries once cached."""
+        self.client.get(reverse('list_lessons'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('list_lessons'))
+        self.assertContains(response, f'<option value="{self.student.pk}"')
+        self.assertFalse([query for query in queries if 'DISTINCT' in query['sql']])
+
+    def test_writes_move_dependent_lists_to_new_options(self):
+        """Test that saving a row refreshes the options of the lists that depend on it."""
+        versions = {name: filter_options_cache_key(name) for name in ('lessons', 'invoices', 'notifications')}
+        Invoice.objects.create(student=self.student, amount=10, due_date=self.date.date())
+        self.assertEqual(filter_options_cache_key('lessons'), versions['lessons'])
+        self.assertNotEqual(filter_options_cache_key('invoices'), versions['invoices'])
+        self.assertEqual([user.pk for user in filter_options('invoices')['students']], [self.student.pk])
+        self.create_lesson(duration=30)
+        self.assertIn(30, filter_options('lessons')['durations'])
+
+    def test_reading_a_notification_keeps_the_options(self):
+        """Test that updates of fields the options ignore do not refresh them."""
+        notification = Notification.objects.create(user=self.student, message='Hello')
+        key = filter_options_cache_key('notifications')
+        notification.is_read = True
+        notification.save(update_fields=['is_read'])
+        self.assertEqual(filter_options_cache_key('notifications'), key)
+
+    def test_bulk_writes_refresh_the_options(self):
+        """Test that broadcasts, which skip signals, refresh the notification options."""
+        self.assertEqual(filter_options('notifications')['users'], [])
+        broadcast(User.objects.filter(pk=self.tutor.pk), 'Hello')
+        self.assertEqual([user.pk for user in filter_options('notifications')['users']], [self.tutor.pk])
+
+    def test_lost_version_starts_a_new_one(self):
+        """Test that losing the version key never brings back options cached under an old version."""
+        key = filter_options_cache_key('lessons')
+        cache.delete(filter_options_version_key('lessons'))
+        self.assertNotEqual(filter_options_cache_key('lessons'), key)
@@ -0,0 +1,43 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tutorials.models import User, Lesson, Invoice, Subject
+
+
+class GenerateInvoicesViewTest(TestCase):
+    """Tests for the admin batch invoicing view."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.url = reverse('generate_invoices')
+        self.admin = User.objects.get(pk=3)
+        self.lesson = Lesson.objects.create(
+            student=User.objects.get(pk=1),
+            subject=Subject.objects.get(pk=1),
+            tutor=User.objects.get(pk=2),
+            date=timezone.now() + timedelta(days=1),
+            duration=60,
+            status='Approved',
+        )
+
+    def test_get_previews_invoices(self):
+        self.client.login(username=self.admin.username, password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'admin/generate_invoices.html')
+        self.assertEqual(response.context['count'], 1)
+        self.assertFalse(Invoice.objects.exists())
+
+    def test_post_creates_invoices(self):
+        self.client.login(username=self.admin.username, password='Password123')
+        response = self.client.post(self.url, follow=True)
+        self.assertRedirects(response, reverse('list_invoices'))
+        self.assertTrue(Invoice.objects.filter(lesson=self.lesson).exists())
+        self.assertContains(response, '1 invoices created')
+
+    def test_students_cannot_generate_invoices(self):
+        self.client.login(username='@charlie', password='Password123')
+        self.client.post(self.url)
+        self.assertFalse(Invoice.objects.exists())
@@ -1,13 +1,18 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from tutorials.models import User, Notification
+from tutorials.notifications import broadcast, unread_count
+from tutorials.tests.helpers import LOCAL_CACHES
 
+@override_settings(CACHES=LOCAL_CACHES)
 class NotificationViewTest(TestCase):
     """Tests the notifications view."""
 
     fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
 
     def setUp(self):
+        cache.clear()
         self.user = User.objects.get(pk=1)
         self.notification = Notification.objects.create(
             user=self.user,
@@ -52,4 +57,72 @@ class NotificationViewTest(TestCase):
         response = self.client.get(url)
         notifications = response.context['notifications']
         self.assertEqual(len(notifications), 1)
-        self.assertEqual(notifications[0], self.notification)
\ No newline at end of file
+        self.assertEqual(notifications[0], self.notification)
+
+    def test_user_cannot_mark_another_users_notification(self):
+        other = Notification.objects.create(user=User.objects.get(pk=2), message="Other's notification")
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(reverse('mark_notification_read', args=[other.pk]))
+        self.assertEqual(response.status_code, 404)
+        other.refresh_from_db()
+        self.assertFalse(other.is_read)
+
+    @override_settings(ADMIN_LIST_PAGE_SIZE=2)
+    def test_notifications_are_paginated(self):
+        for index in range(4):
+            Notification.objects.create(user=self.user, message=f"Notification {index}")
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(reverse('notifications'))
+        self.assertEqual(len(response.context['notifications']), 2)
+        self.assertTrue(response.context['page'].has_next())
+        response = self.client.get(reverse('notifications'), {'after': response.context['page'].next_cursor})
+        self.assertEqual(len(response.context['notifications']), 2)
+
+    def test_navbar_shows_unread_count(self):
+        Notification.objects.create(user=self.user, message="Second notification")
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(reverse('notifications'))
+        self.assertContains(response, 'Notifications <span class="badge rounded-pill bg-danger">2</span>', html=False)
+
+    def test_unread_count_is_cached(self):
+        self.assertEqual(unread_count(self.user.pk), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user.pk), 1)
+
+    def test_unread_count_follows_mark_read(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self.assertEqual(unread_count(self.user.pk), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('mark_notification_read', args=[self.notification.pk]))
+        self.assertEqual(unread_count(self.user.pk), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('mark_notification_read', args=[self.notification.pk]))
+        self.assertEqual(unread_count(self.user.pk), 1)
+
+    def test_unread_count_follows_reassignment_and_deletion(self):
+        other = User.objects.get(pk=2)
+        self.assertEqual((unread_count(self.user.pk), unread_count(other.pk)), (1, 0))
+        self.notification.user = other
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notification.save()
+        self.assertEqual((unread_count(self.user.pk), unread_count(other.pk)), (0, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notification.delete()
+        self.assertEqual(unread_count(other.pk), 0)
+
+    def test_unread_count_follows_broadcast(self):
+        self.assertEqual(unread_count(self.user.pk), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            broadcast(User.objects.filter(pk=self.user.pk), "Broadcast notification")
+        self.assertEqual(unread_count(self.user.pk), 2)
+
+    def test_unread_count_is_invalidated_after_commit(self):
+        """Test that the cached count is kept until the new notifications are committed."""
+        self.assertEqual(unread_count(self.user.pk), 1)
+        with self.captureOnCommitCallbacks() as callbacks:
+            broadcast(User.objects.filter(pk=self.user.pk), "Broadcast notification")
+            Notification.objects.create(user=self.user, message='Another')
+            self.assertEqual(unread_count(self.user.pk), 1)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(unread_count(self.user.pk), 3)
@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tutorials.models import User, Lesson, Subject, Invoice, Notification
+from tutorials.tests.helpers import QueryBudgetMixin
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Tests that list pages do not run a query per row."""
+
+    fixtures = ['tutorials/tests/fixtures/subjects.json', 'tutorials/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.student = User.objects.get(pk=1)
+        self.tutor = User.objects.get(pk=2)
+        self.admin = User.objects.get(pk=3)
+        self.subjects = list(Subject.objects.all())
+        self.start = timezone.now() + timedelta(days=1)
+        self.created = 0
+        self.add_rows()
+
+    def add_rows(self, count=3):
+        """Create lessons, invoices and notifications with distinct related objects."""
+
+        for _ in range(count):
+            self.created += 1
+            student = User.objects.create_user(
+                username=f'@budgetstudent{self.created}',
+                email=f'budgetstudent{self.created}@example.org',
+                first_name='Budget',
+                last_name='Student',
+                password='Password123',
+                type='student',
+            )
+            lesson = Lesson.objects.create(
+                student=student,
+                subject=self.subjects[self.created % len(self.subjects)],
+                tutor=self.tutor,
+                date=self.start + timedelta(days=self.created),
+                duration=60,
+                status='Approved',
+            )
+            Lesson.objects.create(
+                student=self.student,
+                subject=self.subjects[self.created % len(self.subjects)],
+                tutor=self.tutor,
+                date=self.start + timedelta(days=self.created, hours=3),
+                duration=60,
+                status='Approved',
+            )
+            Invoice.objects.create(student=student, lesson=lesson, amount=20, due_date=self.start.date())
+            Notification.objects.create(user=student, message='Budget notification')
+
+    def test_admin_list_pages_run_constant_queries(self):
+        self.client.login(username=self.admin.username, password='Password123')
+        for name in ['list_users', 'list_lessons', 'list_invoices', 'list_notifications']:
+            with self.subTest(page=name):
+                self.assert_constant_queries(reverse(name), self.add_rows, maximum=20)
+
+    def test_student_pages_run_constant_queries(self):
+        self.client.login(username=self.student.username, password='Password123')
+        for name in ['student_dashboard', 'student_lessons', 'student_requests']:
+            with self.subTest(page=name):
+                self.assert_constant_queries(reverse(name), self.add_rows, maximum=20)
+
+    def test_tutor_pages_run_constant_queries(self):
+        self.client.login(username=self.tutor.username, password='Password123')
+        for name in ['tutor_dashboard', 'tutor_lessons']:
+            with self.subTest(page=name):
+                self.assert_constant_queries(reverse(name), self.add_rows, maximum=20)
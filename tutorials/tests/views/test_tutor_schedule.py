@@ -51,4 +51,21 @@ class TutorScheduleTest(TestCase):
         )
         url = reverse('tutor_schedule')
         response = self.client.get(url)
-        self.assertEqual(response.status_code, 200)
\ No newline at end of file
+        self.assertEqual(response.status_code, 200)
+
+    def test_schedule_places_recurring_lessons_on_each_day(self):
+        start = timezone.now().replace(day=1, hour=10, minute=0, second=0, microsecond=0)
+        Lesson.objects.create(
+            tutor=self.tutor,
+            student=User.objects.get(pk=1),
+            subject=Subject.objects.get(pk=1),
+            date=start,
+            duration=60,
+            status='Approved',
+            recurrence='Weekly',
+            recurrence_end_date=start.date() + timedelta(days=20),
+        )
+        url = reverse('tutor_schedule', kwargs={'year': start.year, 'month': start.month})
+        response = self.client.get(url)
+        days = {day['day']: day['lessons'] for week in response.context['calendar'] for day in week if day}
+        self.assertEqual([day for day, lessons in days.items() if lessons], [1, 8, 15])
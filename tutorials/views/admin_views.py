@@ -1,12 +1,21 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from tutorials.models import Lesson, Invoice, User, Notification, Subject
-from tutorials.forms import UserForm, LessonForm, InvoiceForm, NotificationForm
-from django.db.models import Q
+from tutorials.forms import UserForm, LessonForm, InvoiceForm, NotificationForm, BroadcastForm
 from django.utils import timezone
 from django.contrib import messages
 from tutorials.decorators import user_type_required
 from tutorials.helpers import calculate_invoice_amount, model_is_valid
+from tutorials.stats import dashboard_stats
+from tutorials.billing import invoice_approved_lessons
+from tutorials.notifications import broadcast, invoice_message
+from tutorials.pagination import paginate
+from tutorials.sorting import SORTS
+from tutorials.options import filter_options
+from tutorials.filters import filter_users, filter_lessons, filter_invoices, filter_notifications
+from tutorials.exports import EXPORTS, FORMATS, export_lines
+from tutorials.autocomplete import LOOKUPS, autocomplete as autocomplete_options
 from django.apps import apps
 
 # Admin dashboard
@@ -14,45 +23,7 @@ from django.apps import apps
 @user_type_required(['admin'])
 def dashboard(request):
     """Display the admin dashboard"""
-
-    # Users
-    total_users = User.objects.count()
-    student_users = User.objects.filter(type='student').count()
-    tutor_users = User.objects.filter(type='tutor').count()
-    admin_users = User.objects.filter(type='admin').count()
-
-    # Lessons
-    total_lessons = Lesson.objects.filter(date__gte=timezone.now()).count()
-    approved_lessons = Lesson.objects.filter(status='Approved', date__gte=timezone.now()).count()
-    pending_lessons = Lesson.objects.filter(status='Pending', date__gte=timezone.now()).count()
-    rejected_lessons = Lesson.objects.filter(status='Rejected', date__gte=timezone.now()).count()
-
-    # Invoice counts
-    total_invoices = Invoice.objects.count()
-    paid_invoices = Invoice.objects.filter(paid=True).count()
-    unpaid_invoices = Invoice.objects.filter(paid=False).count()
-
-    # Notification counts
-    total_notifications = Notification.objects.count()
-    read_notifications = Notification.objects.filter(is_read=True).count()
-    unread_notifications = Notification.objects.filter(is_read=False).count()
-
-    context = {
-        'total_users': total_users,
-        'student_users': student_users,
-        'tutor_users': tutor_users,
-        'admin_users': admin_users,
-        'total_lessons': total_lessons,
-        'approved_lessons': approved_lessons,
-        'pending_lessons': pending_lessons,
-        'rejected_lessons': rejected_lessons,
-        'total_invoices': total_invoices,
-        'unpaid_invoices': unpaid_invoices,
-        'paid_invoices': paid_invoices,
-        'total_notifications': total_notifications,
-        'read_notifications': read_notifications,
-        'unread_notifications': unread_notifications,
-    }
+    context = dashboard_stats()
     return render(request, 'admin/admin_dashboard.html', context)
 
 # User views
@@ -61,21 +32,20 @@ def dashboard(request):
 def list_users(request):
     users = User.objects.all()
 
-    # Handle filtering
-    type_filter = request.GET.get('type')
-    if type_filter: users = users.filter(type=type_filter)
+    # Handle filtering and searching
+    users = filter_users(users, request.GET)
 
-    # Handle searching
-    search_query = request.GET.get('search')
-    if search_query:
-        users = users.filter(Q(username__icontains=search_query) | Q(email__icontains=search_query) | Q(first_name__icontains=search_query) | Q(last_name__icontains=search_query))
-
-    # Handle searching
-    order_by = request.GET.get('order_by', 'username')
-    users = users.order_by(order_by)
+    # Handle ordering and pagination, searches list username and email prefix matches first
+    sort = SORTS['users']
+    order_by = sort.key(request.GET.get('order_by'))
+    columns = sort.columns(order_by)
+    if request.GET.get('search') and order_by == sort.default:
+        columns = ['search_rank'] + columns
+    page = paginate(request, users, columns, keyset_fields=sort.keyset)
 
     context = {
-        'users': users,
+        'users': page.object_list,
+        'page': page,
         'order_by': order_by,
     }
 
@@ -105,40 +75,18 @@ def create_update_user(request, pk=None):
 @login_required
 @user_type_required(['admin'])
 def list_lessons(request):
-    lessons = Lesson.objects.filter(date__gte=timezone.now())
-
-    # Filtering
-    status_filter = request.GET.get('status')
-    student_filter = request.GET.get('student')
-    subject_filter = request.GET.get('subject')
-    tutor_filter = request.GET.get('tutor')
-    duration_filter = request.GET.get('duration')
-    recurrece_filter = request.GET.get('recurrence')
-
-    if status_filter: lessons = lessons.filter(status=status_filter)
-    if student_filter: lessons = lessons.filter(student__id=student_filter)
-    if subject_filter: lessons = lessons.filter(subject=subject_filter)
-    if tutor_filter: lessons = lessons.filter(tutor=tutor_filter)
-    if duration_filter: lessons = lessons.filter(duration=duration_filter)
-    if recurrece_filter: lessons = lessons.filter(recurrence=recurrece_filter)
-
-    # Searching
-    search_query = request.GET.get('search')
-    if search_query:
-        lessons = lessons.filter(Q(student__username__icontains=search_query) | Q(subject__name__icontains=search_query) | Q(tutor__username__icontains=search_query))
+    lessons = Lesson.objects.filter(date__gte=timezone.now()).select_related('student', 'subject', 'tutor').with_billing_status()
+
+    # Filtering and searching
+    lessons = filter_lessons(lessons, request.GET)
 
     # Ordering
-    order_by = request.GET.get('order_by', 'date')
-    lessons = lessons.order_by(order_by)
+    sort = SORTS['lessons']
+    order_by = sort.key(request.GET.get('order_by'))
+    page = paginate(request, lessons, sort.columns(order_by), keyset_fields=sort.keyset)
 
     # Get values for dropdowns
-    students_with_lessons = User.objects.filter(id__in=Lesson.objects.filter(date__gte=timezone.now()).values_list('student', flat=True).distinct()).order_by('username')
-    subjects = Subject.objects.filter(id__in=Lesson.objects.filter(date__gte=timezone.now()).values_list('subject', flat=True).distinct()).order_by('name')
-    tutors_with_lessons = User.objects.filter(id__in=Lesson.objects.filter(date__gte=timezone.now()).values_list('tutor', flat=True).distinct()).order_by('username')
-    durations = Lesson.objects.filter(date__gte=timezone.now()).values_list('duration', flat=True).distinct()
-    recurrences = Lesson.objects.filter(date__gte=timezone.now()).values_list('recurrence', flat=True).distinct()
-    
-    context = {'lessons': lessons, 'order_by': order_by, 'students_with_lessons': students_with_lessons, 'subjects': subjects, 'tutors_with_lessons': tutors_with_lessons, 'durations': durations, 'recurrences': recurrences}
+    context = {'lessons': page.object_list, 'page': page, 'order_by': order_by, **filter_options('lessons')}
 
     return render(request, 'admin/list_lessons.html', context)
 
@@ -160,38 +108,28 @@ def create_update_lesson(request, pk=None):
         else:
             messages.error(request, 'There was an error with your submission. Please check the form for details.')
 
-    return render(request, 'admin/create_update_lesson.html', {'form': form})
+    return render(request, 'admin/create_update_lesson.html', {'form': form, 'suggested_tutors': form.suggested_tutors()})
 
 
 # Invoice views
 @login_required
 @user_type_required(['admin'])
 def list_invoices(request):
-    invoices = Invoice.objects.all()
+    invoices = Invoice.objects.select_related('student', 'lesson__student', 'lesson__subject')
 
-    # Filtering
-    paid_filter = request.GET.get('paid')
-    student_filter = request.GET.get('student')
-
-    if paid_filter: invoices = invoices.filter(paid=(paid_filter == 'True'))
-    if student_filter: invoices = invoices.filter(student__id=student_filter)
-
-    # Searching
-    search_query = request.GET.get('search')
-    if search_query:
-        invoices = invoices.filter(Q(student__username__icontains=search_query) | Q(amount__icontains=search_query))
+    # Filtering and searching
+    invoices = filter_invoices(invoices, request.GET)
 
     # Ordering
-    order_by = request.GET.get('order_by', 'due_date')
-    invoices = invoices.order_by(order_by)
-
-    # Get distinct values for dropdowns
-    students = User.objects.filter(id__in=Invoice.objects.values_list('student', flat=True).distinct()).order_by('username')
+    sort = SORTS['invoices']
+    order_by = sort.key(request.GET.get('order_by'))
+    page = paginate(request, invoices, sort.columns(order_by), keyset_fields=sort.keyset)
 
     context = {
-        'invoices': invoices,
+        'invoices': page.object_list,
+        'page': page,
         'order_by': order_by,
-        'students': students,
+        **filter_options('invoices'),
     }
 
     return render(request, 'admin/list_invoices.html', context)
@@ -239,36 +177,37 @@ def create_update_invoice(request, pk=None):
 
     return render(request, 'admin/create_update_invoice.html', {'form': form})
 
+@login_required
+@user_type_required(['admin'])
+def generate_invoices(request):
+    """Invoice every approved lesson that has no invoice yet."""
+    if request.method == 'POST':
+        count, total = invoice_approved_lessons()
+        messages.success(request, f'{count} invoices created, totalling £{total}.')
+        return redirect('list_invoices')
+    count, total = invoice_approved_lessons(commit=False)
+    return render(request, 'admin/generate_invoices.html', {'count': count, 'total': total})
+
 
 # Notification views
 @login_required
 @user_type_required(['admin'])
 def list_notifications(request):
-    notifications = Notification.objects.all()
-
-    # Filtering
-    status_filter = request.GET.get('is_read')
-    user_filter = request.GET.get('user')
-
-    if status_filter: notifications = notifications.filter(is_read=status_filter)
-    if user_filter: notifications = notifications.filter(user__id=user_filter)
+    notifications = Notification.objects.select_related('user')
 
-    # Searching
-    search_query = request.GET.get('search')
-    if search_query:
-        notifications = notifications.filter(Q(user__username__icontains=search_query) | Q(message__icontains=search_query))
+    # Filtering and searching
+    notifications = filter_notifications(notifications, request.GET)
 
     # Ordering
-    order_by = request.GET.get('order_by', 'created_at')
-    notifications = notifications.order_by(order_by)
+    sort = SORTS['notifications']
+    order_by = sort.key(request.GET.get('order_by'))
+    page = paginate(request, notifications, sort.columns(order_by), keyset_fields=sort.keyset)
 
-    # Get distinct values for dropdowns
-    users = User.objects.filter(id__in=Notification.objects.values_list('user', flat=True).distinct()).order_by('username')
-    
     context = {
-        'notifications': notifications,
+        'notifications': page.object_list,
+        'page': page,
         'order_by': order_by,
-        'users': users,
+        **filter_options('notifications'),
     }
 
     return render(request, 'admin/list_notifications.html', context)
@@ -288,12 +227,7 @@ def create_notification(request):
 
         if model_name == 'Invoice':
             user = obj.student
-            if obj.paid:
-                message = f"Your invoice {obj.pk} for {obj.amount} has been paid"
-            elif obj.is_overdue():
-                message = f"You have failed to pay your invoice {obj.pk} for {obj.amount} before {obj.due_date.strftime('%d/%m/%Y')} and it is now overdue, which may affect your ability to book lessons"
-            else:
-                message = f"Reminder: Please pay your invoice {obj.pk} for {obj.amount} before {obj.due_date.strftime('%d/%m/%Y')}"
+            message = invoice_message(obj)
         elif model_name == 'Lesson':
             user = obj.student
             if obj.status == 'Approved' and obj.is_assigned:
@@ -326,6 +260,24 @@ def create_notification(request):
 
     return render(request, 'admin/create_notification.html', {'form': form})
 
+@login_required
+@user_type_required(['admin'])
+def broadcast_notification(request):
+    """Preview the audience of a notification and send it to every recipient."""
+    form = BroadcastForm(request.POST or None)
+    recipient_count = None
+    if request.method == 'POST':
+        if form.is_valid():
+            if request.POST.get('action') == 'send':
+                count = broadcast(form.recipients(), form.cleaned_data['message'])
+                messages.success(request, f'Notification sent to {count} users.')
+                return redirect('list_notifications')
+            recipient_count = form.recipients().count()
+        else:
+            messages.error(request, 'There was an error with your submission. Please check the form for details.')
+
+    return render(request, 'admin/broadcast_notification.html', {'form': form, 'recipient_count': recipient_count})
+
 # Delete notifications
 @login_required
 @user_type_required(['admin'])
@@ -336,4 +288,26 @@ def delete_object(request, model_name, pk):
         if request.method == 'POST':
             obj.delete()
             return redirect(f'list_{model_name.lower()}s')
-    return render(request, 'admin/delete_object.html', {'object': obj, 'model_name': model_name.lower()})
\ No newline at end of file
+    return render(request, 'admin/delete_object.html', {'object': obj, 'model_name': model_name.lower()})
+
+
+# Export views
+@login_required
+@user_type_required(['admin'])
+def export(request, name):
+    """Stream an admin list, with its filters and search applied, as CSV or JSON Lines."""
+    format = request.GET.get('format', 'csv')
+    if name not in EXPORTS or format not in FORMATS:
+        raise Http404
+    response = StreamingHttpResponse(export_lines(name, format, request.GET), content_type=FORMATS[format])
+    response['Content-Disposition'] = f'attachment; filename="{name}.{format}"'
+    return response
+
+
+@login_required
+@user_type_required(['admin'])
+def autocomplete(request, name):
+    """Return the options of an autocomplete select matching the typed term, as JSON."""
+    if name not in LOOKUPS:
+        raise Http404
+    return JsonResponse({'results': autocomplete_options(name, request.GET.get('q', ''), request.GET)})
@@ -3,11 +3,12 @@ from tutorials.decorators import user_type_required
 from django.shortcuts import redirect, render, get_object_or_404
 from django.urls import reverse
 from tutorials.models import Lesson, Invoice, Notification
-from calendar import monthrange
 from datetime import datetime
 from django.contrib import messages
 from django.http import HttpResponseRedirect, HttpResponseBadRequest
 from tutorials.forms import RequestForm
+from tutorials.helpers import build_month_calendar, month_range
+from tutorials.notifications import DASHBOARD_NOTIFICATIONS
 
 
 @login_required
@@ -17,12 +18,8 @@ def dashboard(request):
 
     # Get student's dashboard data
     user = request.user
-    lessons = Lesson.objects.filter(student=user, status="Approved")
-    upcoming_lessons = []
-    for lesson in lessons:
-        if lesson.is_upcoming():
-            upcoming_lessons.append(lesson)
-    unread_notifications = Notification.objects.filter(user=user, is_read=False)
+    upcoming_lessons = Lesson.objects.filter(student=user, status="Approved").upcoming().select_related('subject', 'tutor').order_by('next_occurrence')
+    unread_notifications = Notification.objects.filter(user=user).unread().order_by('-created_at')[:DASHBOARD_NOTIFICATIONS]
     
     context = {
         'user': user,
@@ -36,11 +33,7 @@ def dashboard(request):
 def lessons(request):
     """View all upcoming lessons for the logged-in student."""
     user = request.user
-    lessons = Lesson.objects.filter(student=user, status="Approved")
-    upcoming_lessons = []
-    for lesson in lessons:
-        if lesson.is_upcoming():
-            upcoming_lessons.append(lesson)
+    upcoming_lessons = Lesson.objects.filter(student=user, status="Approved").upcoming().select_related('subject', 'tutor').order_by('next_occurrence')
     return render(request, 'student/list_lessons.html', {'lessons': upcoming_lessons})
 
 @login_required
@@ -52,31 +45,11 @@ def schedule(request, year=None, month=None):
     today = datetime.today()
     year = year or today.year
     month = month or today.month
-    # Get lessons for the given month
-    all_lessons = Lesson.objects.filter(student=user, status="Approved")
-    lessons = []
-    for lesson in all_lessons:
-        for date in lesson.lesson_dates():
-            if date.year == year and date.month == month:
-                lessons.append(lesson)
-
-    # Generate calendar structure
-    days_in_month = monthrange(year, month)[1]
-    first_day_of_month = datetime(year, month, 1).weekday()
-    calendar = []
-    week = [None] * first_day_of_month
-
-    for day in range(1, days_in_month + 1):
-        day_lessons = [lesson for lesson in lessons if any(date.date() == datetime(year, month, day).date() for date in lesson.lesson_dates())]
-        day_lessons = list(set(day_lessons))
-        week.append({"day": day, "lessons": day_lessons})
-        if len(week) == 7:
-            calendar.append(week)
-            week = []
-
-    if week:
-        week.extend([None] * (7 - len(week)))
-        calendar.append(week)
+    # Bucket the month's occurrences into a calendar grid
+    month_start, month_end = month_range(year, month)
+    lessons = Lesson.objects.filter(student=user, status="Approved").overlapping(month_start, month_end).select_related('subject', 'tutor')
+    occurrences = ((date, lesson) for lesson in lessons for date in lesson.occurrences_between(month_start, month_end))
+    calendar = build_month_calendar(year, month, occurrences)
 
     context = {
         "calendar": calendar,
@@ -96,7 +69,7 @@ def schedule(request, year=None, month=None):
 def requests(request):
     """View all requested lessons for the logged-in student."""
     user = request.user
-    lessons = Lesson.objects.filter(student=user).order_by('date')
+    lessons = Lesson.objects.filter(student=user).select_related('subject', 'tutor').order_by('date')
     return render(request, 'student/list_requests.html', {'lessons': lessons})
 
 @login_required
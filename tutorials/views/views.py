@@ -10,6 +10,7 @@ from django.urls import reverse
 from tutorials.forms import LogInForm, PasswordForm, SignUpForm, ProfileForm
 from tutorials.models import Notification
 from tutorials.helpers import login_prohibited
+from tutorials.pagination import paginate
 
 # Landing page - only visible to users that are not logged in
 @login_prohibited
@@ -187,14 +188,14 @@ def log_out(request):
 # Display user's notification list
 @login_required
 def notifications(request):
-    """View all notifications for the logged-in student."""
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-    return render(request, 'profile/list_notifications.html', {'notifications': notifications})
+    """View the notifications of the logged-in user, newest first, one page at a time."""
+    page = paginate(request, Notification.objects.filter(user=request.user), '-created_at', keyset_fields=['created_at'])
+    return render(request, 'profile/list_notifications.html', {'notifications': page.object_list, 'page': page})
 
 # Toggle notification read status
 @login_required
 def mark_notification_read(request, pk):
-    notification = get_object_or_404(Notification, id=pk)
+    notification = get_object_or_404(Notification, id=pk, user=request.user)
     notification.is_read = not notification.is_read
-    notification.save()
+    notification.save(update_fields=['is_read'])
     return redirect('notifications')
\ No newline at end of file